@@ -3,13 +3,23 @@
 # ============================================================
 
 import os
+import re
+import io
+import codecs
 import sys
 import logging
 import traceback
 import secrets
+import shutil
+import tempfile
+import threading
+import uuid
+import hashlib
 import random
 import string
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from functools import lru_cache, wraps
+from html import escape as html_escape
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -38,7 +48,7 @@ print(f"📁 Database exists: {os.path.exists(DB_PATH)}")
 
 from flask import (
     Flask, render_template, request, redirect, session,
-    flash, jsonify, send_file, abort, make_response
+    flash, jsonify, send_file, abort, make_response, g
 )
 from flask import got_request_exception
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -59,6 +69,13 @@ app = Flask(
 
 app.secret_key = os.environ.get('SECRET_KEY', 'dev-key-change-in-production-' + secrets.token_hex(32))
 
+# ------------------------------------------------------------
+# Template rendering: skip per-render mtime checks in production
+# (Flask passes this to Jinja as auto_reload when jinja_env is built)
+# ------------------------------------------------------------
+if os.environ.get("FLASK_ENV") == "production":
+    app.config["TEMPLATES_AUTO_RELOAD"] = False
+
 # ------------------------------------------------------------
 # Secure session cookie configuration (essentials)
 # ------------------------------------------------------------
@@ -67,6 +84,21 @@ app.config["SESSION_COOKIE_HTTPONLY"] = True
 app.config["SESSION_COOKIE_SAMESITE"] = "Lax"
 app.config["PERMANENT_SESSION_LIFETIME"] = timedelta(days=7)
 
+# ------------------------------------------------------------
+# Server-side sessions: with REDIS_URL set, session data (progress,
+# xp, conversation, ...) lives in Redis and only a session id travels
+# in the cookie. Without Redis we stay on Flask's signed cookies.
+# ------------------------------------------------------------
+if os.environ.get("REDIS_URL"):
+    import redis
+    from flask_session import Session
+
+    app.config["SESSION_TYPE"] = "redis"
+    app.config["SESSION_REDIS"] = redis.Redis.from_url(os.environ["REDIS_URL"])
+    app.config["SESSION_PERMANENT"] = False
+    app.config["SESSION_KEY_PREFIX"] = "sess:"
+    Session(app)
+
 # CSRF protection - enabled globally. We'll exempt JSON POST endpoints below
 csrf = CSRFProtect(app)
 
@@ -83,6 +115,10 @@ app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER', 'norep
 
 mail = Mail(app)
 
+# Notifications that shouldn't hold a request thread while SMTP responds
+from concurrent.futures import ThreadPoolExecutor
+mail_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="mail")
+
 # ============================================================
 # RATE LIMITING (FLASK-LIMITER)
 # ============================================================
@@ -90,14 +126,36 @@ mail = Mail(app)
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
+# Counters live in Redis when REDIS_URL is set so limits hold across
+# workers/restarts; otherwise (and if Redis drops) they stay in memory.
 limiter = Limiter(
     app=app,
     key_func=get_remote_address,
     default_limits=["200 per day", "50 per hour"],  # Global default limits
-    storage_uri="memory://",  # Use memory storage (upgrade to Redis for production)
+    storage_uri=os.environ.get("REDIS_URL", "memory://"),
+    in_memory_fallback_enabled=True,
     strategy="fixed-window"
 )
 
+# ============================================================
+# RESPONSE COMPRESSION (FLASK-COMPRESS)
+# ============================================================
+
+from flask_compress import Compress
+
+# Lesson plans and Teacher's Pet replies embed multi-KB bodies;
+# gzip level 5 is cheap CPU-wise compared to the bytes it saves on mobile.
+app.config["COMPRESS_MIMETYPES"] = [
+    "text/html",
+    "application/json",
+    "text/css",
+    "application/javascript",
+]
+app.config["COMPRESS_LEVEL"] = 5
+app.config["COMPRESS_ALGORITHM"] = "gzip"
+
+Compress(app)
+
 # ============================================================
 # OWNER + ADMIN
 # ============================================================
@@ -158,7 +216,9 @@ from models import (
     StudentSubmission,
     QuestionLog,
 )
-from sqlalchemy import func
+from sqlalchemy import func, update, insert, case, distinct
+from sqlalchemy.orm import selectinload, joinedload, load_only
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.exc import SQLAlchemyError, OperationalError
 import json
 import time
@@ -528,6 +588,40 @@ def rebuild_database_if_needed():
 
         ensure_column("assigned_practice", practice_cols, "assignment_type", "VARCHAR(20) DEFAULT 'practice'")
 
+        # Indices added to models.py after a table already exists are not
+        # created by db.create_all(), so backfill them here
+        def ensure_index(name, table, columns_sql):
+            try:
+                cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns_sql})")
+                conn.commit()
+            except Exception as e:
+                print(f"⚠️ Could not create index {name}: {e}")
+
+        ensure_index("idx_student_class_id", "students", "class_id")
+        ensure_index("idx_assessment_result_student_created_at", "assessment_results", "student_id, created_at")
+        ensure_index("idx_activity_log_student_created_at", "activity_log", "student_id, created_at")
+        ensure_index("idx_assessment_result_student_subject_topic", "assessment_results", "student_id, subject, topic")
+        ensure_index("idx_message_recipient_unread", "messages", "recipient_type, recipient_id, is_read")
+        ensure_index("idx_message_recipient_created_at", "messages", "recipient_type, recipient_id, created_at")
+        ensure_index("idx_message_sender_created_at", "messages", "sender_type, sender_id, created_at")
+        ensure_index("idx_homeschool_lesson_plan_parent_created_at", "homeschool_lesson_plans", "parent_id, created_at")
+
+        # One-time backfill: older QuestionLog rows stored moderation data as
+        # str(dict) (Python repr); rewrite them as real JSON
+        if question_logs_exists:
+            cur.execute("SELECT id, moderation_data_json FROM question_logs WHERE moderation_data_json LIKE '{''%'")
+            legacy_rows = cur.fetchall()
+            if legacy_rows:
+                import ast
+                for log_id, raw in legacy_rows:
+                    try:
+                        fixed = json.dumps(ast.literal_eval(raw), default=str)
+                    except Exception:
+                        fixed = json.dumps({"raw": raw})
+                    cur.execute("UPDATE question_logs SET moderation_data_json = ? WHERE id = ?", (fixed, log_id))
+                conn.commit()
+                print(f"✅ Converted {len(legacy_rows)} question_logs.moderation_data_json rows to JSON")
+
         # Create student_submissions table if it doesn't exist
         if not submissions_exists:
             try:
@@ -648,6 +742,58 @@ def safe_email(value: str, max_len: int = 254) -> str:
     v = safe_text(value.lower(), max_len)
     return v
 
+def safe_int(value, default: int, lo: int, hi: int) -> int:
+    """Coerce a JSON/form value to an int clamped to [lo, hi]; default if unparseable."""
+    try:
+        n = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(lo, min(hi, n))
+
+def safe_date(value):
+    """Parse a YYYY-MM-DD JSON/form value to a datetime; None if blank or invalid."""
+    if not isinstance(value, str) or not value.strip():
+        return None
+    try:
+        return datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+
+QUESTION_LOG_RESPONSE_MAX = 5000  # chars of the AI reply kept in QuestionLog
+
+
+def log_response_text(text: str) -> str:
+    """Trim an AI reply for QuestionLog.ai_response, slicing only when too long."""
+    if text and len(text) > QUESTION_LOG_RESPONSE_MAX:
+        return text[:QUESTION_LOG_RESPONSE_MAX]
+    return text
+
+
+MODERATION_JSON_MAX = 4096  # chars stored per QuestionLog row
+
+
+def moderation_json(moderation_result: dict) -> str:
+    """
+    Serialize moderation details for QuestionLog.moderation_data_json.
+
+    Compact JSON, capped at MODERATION_JSON_MAX without ever cutting a
+    document in half: the per-category score table goes first, then
+    only a marker with the top-level keys is kept.
+    """
+    data = moderation_result.get("moderation_data", {})
+    blob = json.dumps(data, default=str, separators=(",", ":"))
+    if len(blob) <= MODERATION_JSON_MAX:
+        return blob
+
+    openai_check = data.get("openai_moderation")
+    if isinstance(openai_check, dict) and "category_scores" in openai_check:
+        slim = {**data, "openai_moderation": {k: v for k, v in openai_check.items() if k != "category_scores"}}
+        blob = json.dumps(slim, default=str, separators=(",", ":"))
+        if len(blob) <= MODERATION_JSON_MAX:
+            return blob
+
+    return json.dumps({"truncated": True, "keys": sorted(map(str, data))}, separators=(",", ":"))
+
 # ============================================================
 # JINJA2 FILTERS
 # ============================================================
@@ -670,7 +816,7 @@ def fromjson_filter(value):
 
 sys.path.append(os.path.join(BASE_DIR, "modules"))
 
-from modules.shared_ai import study_buddy_ai  # AI wrapper
+from modules.shared_ai import study_buddy_ai, simple_ai_call, get_client, ai_request  # AI wrappers
 from modules.personality_helper import get_all_characters
 from modules.content_moderation import moderate_content, get_moderation_summary
 from modules import (
@@ -689,6 +835,10 @@ from modules import (
 from modules.practice_helper import generate_practice_session
 from modules.answer_formatter import parse_into_sections
 from modules.teacher_tools import assign_questions, generate_lesson_plan
+from modules.cache_helper import cache_get, cache_set, cache_delete, cache_get_json, cache_set_json, get_redis
+from modules.http_client import get_http_session, HTTP_TIMEOUT
+from modules.achievement_helper import DASHBOARD_CACHE_TTL, dashboard_cache_key, invalidate_dashboard
+from modules.auto_logger import WEEKLY_REPORT_CACHE_TTL, weekly_report_cache_key, invalidate_weekly_report
 import string
 
 # ============================================================
@@ -725,6 +875,71 @@ from subjects_config import (
 subject_map = get_subject_map()
 SUBJECT_LABELS = get_subject_labels()
 
+
+def _power_grid_redirect(question, grade, character):
+    """PowerGrid has no Q&A handler; route the student into the deep-study flow."""
+    return ("redirect", f"/ask-question?subject=power_grid&grade={grade}")
+
+
+# Subjects that hand off to another page return ("redirect", url) instead of text
+subject_map["power_grid"] = _power_grid_redirect
+
+# ============================================================
+# REQUEST-SCOPED LOADERS (batch Parent/Teacher/Student lookups)
+# ============================================================
+
+
+class BatchLoader:
+    """
+    Per-request identity cache for one model.
+
+    Queue ids with load()/load_many(); the first get() resolves every
+    pending id with a single `WHERE id IN (...)` query. Rows also land in
+    the SQLAlchemy identity map, so lazy many-to-one relationships
+    (e.g. message.student) resolve without another SELECT.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._cache = {}
+        self._pending = set()
+
+    def load(self, obj_id):
+        if obj_id is not None and obj_id not in self._cache:
+            self._pending.add(obj_id)
+
+    def load_many(self, obj_ids):
+        for obj_id in obj_ids:
+            self.load(obj_id)
+
+    def flush(self):
+        if not self._pending:
+            return
+        ids = list(self._pending)
+        self._pending.clear()
+        for obj_id in ids:
+            self._cache[obj_id] = None
+        for row in self.model.query.filter(self.model.id.in_(ids)).all():
+            self._cache[row.id] = row
+
+    def get(self, obj_id):
+        if obj_id is None:
+            return None
+        if obj_id not in self._cache:
+            self._pending.add(obj_id)
+            self.flush()
+        return self._cache.get(obj_id)
+
+
+def get_loader(model):
+    """Return the BatchLoader for `model`, created once per request on flask.g."""
+    loaders = g.setdefault("_loaders", {})
+    loader = loaders.get(model)
+    if loader is None:
+        loader = loaders[model] = BatchLoader(model)
+    return loader
+
+
 # ============================================================
 # HELPERS – TEACHER + OWNER
 # ============================================================
@@ -738,6 +953,29 @@ def get_current_teacher():
     return Teacher.query.get(tid)
 
 
+def get_current_parent():
+    """Get currently logged-in parent, loaded once per request and kept on g."""
+    pid = session.get("parent_id")
+    if not pid:
+        return None
+    parent = g.get("parent")
+    if parent is None or parent.id != pid:
+        parent = Parent.query.get(pid)
+        g.parent = parent
+    return parent
+
+
+def parent_required(view):
+    """Redirect to parent login unless a parent is signed in; the view reads g.parent."""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if not get_current_parent():
+            flash("Please log in as a parent.", "error")
+            return redirect("/parent/login")
+        return view(*args, **kwargs)
+    return wrapped
+
+
 def get_teacher_or_admin():
     """
     Get current teacher, or return a placeholder for admin access.
@@ -778,6 +1016,19 @@ def is_admin() -> bool:
     if session.get("admin_authenticated") or session.get("is_owner"):
         return True
 
+    # The owner-email checks below hit the DB; routes call is_admin() several
+    # times per request, so remember the answer on g for this login state
+    login = (session.get("teacher_id"), session.get("student_id"), session.get("parent_id"))
+    cached = g.get("is_admin")
+    if cached is not None and cached[0] == login:
+        return cached[1]
+    result = _is_owner_login()
+    g.is_admin = (login, result)
+    return result
+
+
+def _is_owner_login() -> bool:
+    """True if the logged-in teacher, student or parent uses the owner email."""
     # Check if logged in as teacher/owner
     if session.get("teacher_id"):
         teacher = Teacher.query.get(session["teacher_id"])
@@ -792,7 +1043,7 @@ def is_admin() -> bool:
 
     # Check if logged in as parent with owner email
     if session.get("parent_id"):
-        parent = Parent.query.get(session["parent_id"])
+        parent = get_current_parent()
         if parent and parent.email and parent.email.lower() == OWNER_EMAIL.lower():
             return True
 
@@ -813,50 +1064,49 @@ def generate_join_code():
             return code
 
 
-def init_user():
-    # Preserve admin flags before setting defaults
-    admin_flags = {
-        "admin_authenticated": session.get("admin_authenticated"),
-        "is_owner": session.get("is_owner"),
-    }
+# Keys every student-facing session carries, with their cold-start values.
+# last_visit and month_start are filled by update_streak/check_monthly_reset.
+SESSION_DEFAULTS = {
+    "tokens": 0,
+    "xp": 0,
+    "level": 1,
+    "streak": 1,
+    "inventory": [],
+    "character": "everly",
+    "usage_minutes": 0,
+    "progress": {},
+    "conversation": [],
+    "deep_study_chat": [],
+    # practice mission pointer (mission data lives server-side)
+    "practice_mission": None,
+    "practice_step": 0,
+    "practice_attempts": 0,
+    # role flags
+    "user_role": None,  # student / parent / teacher / owner
+    "student_name": None,
+    "student_email": None,
+    "parent_name": None,
+    "grade": "8",
+    # usage tracking for plan limits
+    "questions_this_month": 0,
+}
+SESSION_DEFAULT_KEYS = SESSION_DEFAULTS.keys()
 
-    defaults = {
-        "tokens": 0,
-        "xp": 0,
-        "level": 1,
-        "streak": 1,
-        "last_visit": str(datetime.today().date()),
-        "inventory": [],
-        "character": "everly",
-        "usage_minutes": 0,
-        "progress": {},
-        "conversation": [],
-        "deep_study_chat": [],
-        # practice mission storage
-        "practice": None,
-        "practice_step": 0,
-        "practice_attempts": 0,
-        "practice_progress": [],
-        # role flags
-        "user_role": None,  # student / parent / teacher / owner
-        "student_name": None,
-        "student_email": None,
-        "parent_name": None,
-        "grade": "8",
-        # usage tracking for plan limits
-        "questions_this_month": 0,
-        "month_start": str(datetime.today().replace(day=1).date()),
-    }
 
-    # Set all defaults if not present
-    for k, v in defaults.items():
-        if k not in session:
-            session[k] = v
+def init_user():
+    # Student-facing views call this explicitly (webhooks, teacher/admin
+    # pages and /trial_expired deliberately don't, so they never mint a
+    # session). Run the body at most once per request.
+    if g.get("_user_inited"):
+        return
+    g._user_inited = True
 
-    # Restore admin flags after setting defaults
-    for flag, value in admin_flags.items():
-        if value is not None:
-            session[flag] = value
+    # A warm session already has every key; only a cold one gets defaults
+    # (fresh copies of the mutable ones)
+    if not SESSION_DEFAULT_KEYS <= session.keys():
+        for k, v in SESSION_DEFAULTS.items():
+            if k not in session:
+                session[k] = v.copy() if isinstance(v, (list, dict)) else v
 
     update_streak()
     check_monthly_reset()
@@ -867,32 +1117,40 @@ def init_user():
 # ============================================================
 
 
+def request_today():
+    """Today's date, computed once per request and kept on g."""
+    today = g.get("_today")
+    if today is None:
+        today = g._today = date.today()
+    return today
+
+
 def update_streak():
-    today = datetime.today().date()
+    today = request_today()
     last_str = session.get("last_visit")
+    # ISO dates compare as strings, so the common same-day visit needs no parse
+    if last_str == today.isoformat():
+        return
     if not last_str:
-        session["last_visit"] = str(today)
+        session["last_visit"] = today.isoformat()
         session["streak"] = 1
         return
 
-    last = datetime.strptime(last_str, "%Y-%m-%d").date()
-    if today != last:
-        if today - last == timedelta(days=1):
-            session["streak"] += 1
-        else:
-            session["streak"] = 1
-        session["last_visit"] = str(today)
+    if today - date.fromisoformat(last_str) == timedelta(days=1):
+        session["streak"] += 1
+    else:
+        session["streak"] = 1
+    session["last_visit"] = today.isoformat()
 
 
 def check_monthly_reset():
     """Reset question count if new month has started."""
     month_start = session.get("month_start")
-    today = datetime.today().date()
-    first_of_month = today.replace(day=1)
+    first_of_month = request_today().replace(day=1).isoformat()
     
-    if not month_start or datetime.strptime(month_start, "%Y-%m-%d").date() < first_of_month:
+    if not month_start or month_start < first_of_month:
         session["questions_this_month"] = 0
-        session["month_start"] = str(first_of_month)
+        session["month_start"] = first_of_month
         session.modified = True
 
 
@@ -925,27 +1183,23 @@ def increment_question_count():
         session.modified = True
 
 
+# (student_limit, lesson_plans_limit, assignments_limit, has_teacher_features)
+DEFAULT_PARENT_PLAN_LIMITS = (3, 0, 0, False)  # Default free limits
+PARENT_PLAN_LIMITS = {
+    # Homeschool plans (hybrid parent + teacher features)
+    "homeschool_essential": (5, 50, 100, True),  # 5 students, 50 lesson plans/mo, 100 assignments/mo, teacher features enabled
+    "homeschool_complete": (float('inf'), float('inf'), float('inf'), True),  # Unlimited everything, teacher features enabled
+    # Regular parent plans (no teacher features)
+    "basic": (3, 0, 0, False),  # 3 students, no teacher tools
+    "premium": (float('inf'), 0, 0, False),  # Unlimited students, no teacher tools
+}
+
+
 def get_parent_plan_limits(parent):
     """Get plan limits for parent/homeschool accounts. Returns (student_limit, lesson_plans_limit, assignments_limit, has_teacher_features)."""
     if not parent or not parent.plan:
-        return (3, 0, 0, False)  # Default free limits
-    
-    plan = parent.plan.lower()
-    
-    # Homeschool plans (hybrid parent + teacher features)
-    if plan == "homeschool_essential":
-        return (5, 50, 100, True)  # 5 students, 50 lesson plans/mo, 100 assignments/mo, teacher features enabled
-    elif plan == "homeschool_complete":
-        return (float('inf'), float('inf'), float('inf'), True)  # Unlimited everything, teacher features enabled
-    
-    # Regular parent plans (no teacher features)
-    elif plan == "basic":
-        return (3, 0, 0, False)  # 3 students, no teacher tools
-    elif plan == "premium":
-        return (float('inf'), 0, 0, False)  # Unlimited students, no teacher tools
-    
-    # Default for unknown plans
-    return (3, 0, 0, False)
+        return DEFAULT_PARENT_PLAN_LIMITS
+    return PARENT_PLAN_LIMITS.get(parent.plan.lower(), DEFAULT_PARENT_PLAN_LIMITS)
 
 
 def check_parent_student_limit(parent):
@@ -954,7 +1208,7 @@ def check_parent_student_limit(parent):
         return (False, 0, 0)
     
     student_limit, _, _, _ = get_parent_plan_limits(parent)
-    current_count = len(parent.students) if parent.students else 0
+    current_count = Student.query.filter_by(parent_id=parent.id).count()
     allowed = current_count < student_limit
     
     return (allowed, current_count, student_limit)
@@ -1005,7 +1259,7 @@ def check_subscription_access(user_role):
     elif user_role == "parent":
         parent_id = session.get("parent_id")
         if parent_id:
-            user = Parent.query.get(parent_id)
+            user = get_current_parent()
     elif user_role == "teacher":
         teacher_id = session.get("teacher_id")
         if teacher_id:
@@ -1057,6 +1311,9 @@ def get_stripe_price_id(role, plan, billing):
 def add_xp(amount: int):
     session["xp"] += amount
     xp_needed = session["level"] * 100
+
+    # XP-based achievements are checked while building the dashboard
+    invalidate_dashboard(session.get("student_id"))
     
     # Log level up activity
     if session["xp"] >= xp_needed:
@@ -1084,19 +1341,17 @@ def add_xp(amount: int):
 # ============================================================
 
 
+# Common words stripped from numeric answers (longest first so "percent" beats "perc")
+_NUMERIC_FILLER_RE = re.compile(r"the answer is|answer:|per cent|percent|perc|dollars|dollar|usd|=")
+# Commas and currency/percent symbols, dropped in one str.translate pass
+_NUMERIC_SYMBOL_TABLE = str.maketrans("", "", ",%$")
+
+
 def _normalize_numeric_token(text: str) -> str:
     """Remove common text/symbols from numeric answers for comparison."""
     if not text:
         return ""
-    t = text.lower().strip()
-    # Remove common words
-    for word in ["percent", "perc", "per cent", "dollars", "dollar", "usd", "the answer is", "answer:", "="]:
-        t = t.replace(word, "")
-    # Remove commas and currency symbols
-    t = t.replace(",", "")
-    for ch in ["%", "$"]:
-        t = t.replace(ch, "")
-    return t.strip()
+    return _NUMERIC_FILLER_RE.sub("", text.lower()).translate(_NUMERIC_SYMBOL_TABLE).strip()
 
 
 def _try_float(val: str):
@@ -1154,6 +1409,50 @@ def answers_match(user_raw: str, expected_raw: str) -> bool:
     return False
 
 
+def prepare_expected_answers(expected) -> dict:
+    """
+    Pre-normalize a step's expected answers once, when the step is built.
+
+    Returns a JSON-safe dict (steps live in the session/cache) that
+    answer_in_expected() turns into set lookups instead of calling
+    answers_match() once per expected answer.
+    """
+    exact, numeric, floats = [], [], []
+    for raw in expected or []:
+        raw = str(raw)
+        e_norm = raw.strip().lower()
+        if e_norm:
+            exact.append(e_norm)
+        e_num_str = _normalize_numeric_token(raw)
+        if e_num_str:
+            numeric.append(e_num_str)
+            e_num = _try_float(e_num_str)
+            if e_num is not None:
+                floats.append(e_num)
+    return {"exact": exact, "numeric": numeric, "floats": floats}
+
+
+def answer_in_expected(user_raw: str, prepared: dict) -> bool:
+    """Same rules as answers_match(), against pre-normalized expected answers."""
+    if user_raw is None or not prepared:
+        return False
+
+    u_norm = user_raw.strip().lower()
+    if u_norm and u_norm in set(prepared.get("exact", [])):
+        return True
+
+    u_num_str = _normalize_numeric_token(user_raw)
+    if not u_num_str:
+        return False
+    if u_num_str in set(prepared.get("numeric", [])):
+        return True
+
+    u_num = _try_float(u_num_str)
+    if u_num is None:
+        return False
+    return any(abs(u_num - e_num) < 1e-6 for e_num in prepared.get("floats", []))
+
+
 # ============================================================
 # RECALC ABILITY + AVERAGE (DB-BASED, TEACHER SCORES ONLY)
 # ============================================================
@@ -1233,14 +1532,17 @@ def home():
     return render_template("home.html")
 
 
+# The subject registry is static, so build the /subjects planet tuples once
+# at import instead of re-sorting SUBJECTS on every request.
+SUBJECT_PLANETS = tuple(get_subjects_for_display())
+
+
 @app.route("/subjects")
 def subjects():
     init_user()
-    # Use centralized subject configuration
-    planets = get_subjects_for_display()
     return render_template(
         "subjects.html",
-        planets=planets,
+        planets=SUBJECT_PLANETS,
         character=session.get("character", "everly"),
     )
 
@@ -2375,9 +2677,10 @@ def admin_moderation_stats():
     daily_trend = []
     trend_days = min(14, int(period) if period != "all" else 14)
     max_daily = 0
+    now = datetime.utcnow()
     
     for i in range(trend_days):
-        day = datetime.utcnow() - timedelta(days=trend_days - i - 1)
+        day = now - timedelta(days=trend_days - i - 1)
         day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
         day_end = day_start + timedelta(days=1)
         
@@ -3045,7 +3348,7 @@ def parent_cancel_subscription():
         return redirect("/parent/login")
 
     parent_id = session["parent_id"]
-    parent = Parent.query.get(parent_id)
+    parent = get_current_parent()
 
     if not parent:
         flash("Parent not found.", "error")
@@ -3145,7 +3448,7 @@ def homeschool_cancel_subscription():
         return redirect("/homeschool/login")
 
     parent_id = session["parent_id"]
-    parent = Parent.query.get(parent_id)
+    parent = get_current_parent()
 
     if not parent:
         flash("Parent not found.", "error")
@@ -3671,11 +3974,7 @@ def teacher_dashboard():
     # Count unread messages (0 for admin)
     unread_messages = 0
     if teacher.id:  # Real teacher (not admin)
-        unread_messages = Message.query.filter_by(
-            recipient_type="teacher",
-            recipient_id=teacher.id,
-            is_read=False,
-        ).count()
+        unread_messages = unread_message_count("teacher", teacher.id)
 
     classes = teacher.classes or []
     response = make_response(render_template(
@@ -3837,6 +4136,7 @@ def add_student(class_id):
     student = Student(class_id=class_id, student_name=name, student_email=email)
     db.session.add(student)
     db.session.commit()
+    invalidate_class_analytics(class_id)
     # Save backup after adding student
     backup_classes_to_json()
 
@@ -3866,6 +4166,7 @@ def delete_class(class_id):
     # Delete the class
     db.session.delete(cls)
     db.session.commit()
+    invalidate_class_analytics(class_id)
     
     # Update backup
     backup_classes_to_json()
@@ -3899,6 +4200,7 @@ def delete_student(student_id):
     # Delete the student
     db.session.delete(student)
     db.session.commit()
+    invalidate_class_analytics(cls.id)
     
     # Update backup
     backup_classes_to_json()
@@ -4038,6 +4340,7 @@ def assignment_edit(practice_id):
             q.explanation = safe_text(request.form.get(f"explanation_{qid}", ""), 4000) or None
             q.difficulty_level = request.form.get(f"difficulty_level_{qid}", "") or None
         db.session.commit()
+        invalidate_assignment_steps(assignment.id)
         flash("Questions updated.", "info")
         return redirect(f"/teacher/assignments/{practice_id}/edit")
 
@@ -4093,6 +4396,7 @@ def assignment_add_question(practice_id):
         )
         db.session.add(q)
         db.session.commit()
+        invalidate_assignment_steps(assignment.id)
 
         flash("Question added.", "info")
         return redirect(f"/teacher/assignments/{practice_id}")
@@ -4153,6 +4457,7 @@ def assignment_generate_more(practice_id):
         db.session.add(new_q)
 
     db.session.commit()
+    invalidate_assignment_steps(assignment.id)
 
     return jsonify({
         "success": True,
@@ -4237,6 +4542,7 @@ def edit_question(question_id):
         )
 
         db.session.commit()
+        invalidate_assignment_steps(assignment.id)
         flash("Question updated.", "info")
         return redirect(f"/teacher/assignments/{assignment.id}")
 
@@ -4319,8 +4625,10 @@ def student_join_class():
                 return redirect("/student/join-class")
 
         # Join the class
+        previous_class_id = student.class_id
         student.class_id = class_obj.id
         db.session.commit()
+        invalidate_class_analytics(previous_class_id, class_obj.id)
 
         print(f"✅ Student {student.student_name} (ID:{student.id}) joined class {class_obj.class_name} (Code: {join_code})")
         flash(f"Successfully joined {class_obj.class_name}!", "success")
@@ -4345,8 +4653,10 @@ def student_leave_class():
     class_name = student.class_ref.class_name if student.class_ref else "Unknown"
 
     # Remove from class
+    previous_class_id = student.class_id
     student.class_id = None
     db.session.commit()
+    invalidate_class_analytics(previous_class_id)
 
     print(f"✅ Student {student.student_name} (ID:{student.id}) left class {class_name}")
     flash(f"You've left {class_name}.", "info")
@@ -4403,7 +4713,7 @@ def student_start_assignment(assignment_id):
             student_id=student.id,
             assignment_id=assignment.id,
             status="in_progress",
-            started_at=datetime.utcnow(),
+            started_at=now,
             answers_json="{}"
         )
         db.session.add(submission)
@@ -4412,7 +4722,7 @@ def student_start_assignment(assignment_id):
     elif submission.status == "not_started":
         # Update status to in_progress
         submission.status = "in_progress"
-        submission.started_at = datetime.utcnow()
+        submission.started_at = now
         db.session.commit()
 
     # Parse mission JSON to get questions
@@ -4726,6 +5036,7 @@ def assignment_publish(assignment_id):
     # Mark assignment as published
     assignment.is_published = True
     db.session.commit()
+    invalidate_assignment_steps(assignment.id)
 
     flash("Mission published successfully!", "success")
     return redirect(f"/teacher/assignments/{assignment.id}")
@@ -5241,7 +5552,7 @@ def teacher_generate_lesson_plan():
         # If not admin and not teacher, check if parent/homeschool account
         if not teacher and session.get("parent_id"):
             parent_id = session.get("parent_id")
-            parent = Parent.query.get(parent_id)
+            parent = get_current_parent()
             if parent:
                 _, _, _, has_teacher_features = get_parent_plan_limits(parent)
                 if has_teacher_features:
@@ -5320,7 +5631,7 @@ def teacher_lesson_plans():
     # If not admin and not teacher, check if parent/homeschool account
     if not teacher and session.get("parent_id"):
         parent_id = session.get("parent_id")
-        parent = Parent.query.get(parent_id)
+        parent = get_current_parent()
         if parent:
             _, _, _, has_teacher_features = get_parent_plan_limits(parent)
             if has_teacher_features:
@@ -5578,73 +5889,88 @@ def teacher_gradebook_class(class_id):
     
     # Get all students in this class
     students = cls.students
-    
+
+    # One query for every submission in the class, keyed by (student, assignment)
+    assignment_ids = [a.id for a in assignments]
+    class_submissions = []
+    if assignment_ids:
+        class_submissions = StudentSubmission.query.filter(
+            StudentSubmission.assignment_id.in_(assignment_ids)
+        ).order_by(StudentSubmission.id).all()
+    submissions_by_key = {}
+    for sub in class_submissions:
+        submissions_by_key.setdefault((sub.student_id, sub.assignment_id), sub)
+
+    # Flatten ORM rows into plain dicts so the students x assignments
+    # template loop does dict lookups instead of ORM attribute access
+    # (the template subscripts them; Jinja's dot syntax tries getattr first)
+    assignment_rows = [
+        {
+            'id': a.id,
+            'title': a.title,
+            'assignment_type': a.assignment_type,
+            'due_date': a.due_date,
+        }
+        for a in assignments
+    ]
+
     # Build gradebook matrix: students x assignments
     gradebook_data = []
+    graded_scores_by_assignment = {a_id: [] for a_id in assignment_ids}
     for student in students:
         student_row = {
-            'student': student,
+            'student': {
+                'id': student.id,
+                'student_name': student.student_name,
+                'student_email': student.student_email,
+            },
             'grades': {},
             'average': None
         }
-        
+
         total_score = 0
         graded_count = 0
-        
-        for assignment in assignments:
-            submission = StudentSubmission.query.filter_by(
-                student_id=student.id,
-                assignment_id=assignment.id
-            ).first()
-            
+
+        for a_id in assignment_ids:
+            submission = submissions_by_key.get((student.id, a_id))
+
             if submission and submission.status == 'graded' and submission.score is not None:
-                student_row['grades'][assignment.id] = {
+                student_row['grades'][a_id] = {
                     'score': submission.score,
                     'status': 'graded',
-                    'submission': submission
                 }
                 total_score += submission.score
                 graded_count += 1
             elif submission and submission.status == 'submitted':
-                student_row['grades'][assignment.id] = {
+                student_row['grades'][a_id] = {
                     'score': None,
                     'status': 'submitted',
-                    'submission': submission
                 }
             else:
-                student_row['grades'][assignment.id] = {
+                student_row['grades'][a_id] = {
                     'score': None,
                     'status': 'not_submitted',
-                    'submission': None
                 }
-        
+
         if graded_count > 0:
             student_row['average'] = total_score / graded_count
-        
+
         gradebook_data.append(student_row)
-    
+
     # Calculate class averages per assignment
+    for sub in class_submissions:
+        if sub.status == 'graded' and sub.score is not None:
+            graded_scores_by_assignment[sub.assignment_id].append(sub.score)
+
     assignment_averages = {}
-    for assignment in assignments:
-        submissions = StudentSubmission.query.filter_by(
-            assignment_id=assignment.id,
-            status='graded'
-        ).all()
-        
-        if submissions:
-            scores = [s.score for s in submissions if s.score is not None]
-            if scores:
-                assignment_averages[assignment.id] = sum(scores) / len(scores)
-            else:
-                assignment_averages[assignment.id] = None
-        else:
-            assignment_averages[assignment.id] = None
+    for a_id, scores in graded_scores_by_assignment.items():
+        assignment_averages[a_id] = sum(scores) / len(scores) if scores else None
 
     return render_template(
         "gradebook_class.html",
         teacher=teacher,
         cls=cls,
-        assignments=assignments,
+        assignments=assignment_rows,
         gradebook_data=gradebook_data,
         assignment_averages=assignment_averages,
         is_owner=is_owner(teacher),
@@ -5675,7 +6001,7 @@ def homeschool_gradebook():
         flash("Please log in as a parent.", "error")
         return redirect("/parent/login")
     
-    parent = Parent.query.get(parent_id)
+    parent = get_current_parent()
     if not parent:
         return redirect("/parent/login")
     
@@ -5745,6 +6071,35 @@ def export_lesson_plan_pdf(lesson_id):
 # TEACHER - MESSAGING SYSTEM
 # ============================================================
 
+# Unread badge counts are read on every dashboard render but only change
+# when a message is sent or opened, so they are cached and invalidated there.
+UNREAD_COUNT_TTL = 60
+
+
+def _unread_key(recipient_type: str, recipient_id: int) -> str:
+    return f"v1:msg:unread:{recipient_type}:{recipient_id}"
+
+
+def unread_message_count(recipient_type: str, recipient_id: int) -> int:
+    """Number of unread messages for a teacher/parent (cache-aside)."""
+    key = _unread_key(recipient_type, recipient_id)
+    cached = cache_get(key)
+    if cached is not None:
+        return int(cached)
+    count = Message.query.filter_by(
+        recipient_type=recipient_type,
+        recipient_id=recipient_id,
+        is_read=False,
+    ).count()
+    cache_set(key, str(count), UNREAD_COUNT_TTL)
+    return count
+
+
+def invalidate_unread_count(*recipients) -> None:
+    """Drop cached unread counts for (recipient_type, recipient_id) pairs."""
+    cache_delete(*{_unread_key(t, i) for t, i in recipients})
+
+
 @app.route("/teacher/messages")
 def teacher_messages():
     """Teacher inbox - view all messages from parents."""
@@ -5765,11 +6120,12 @@ def teacher_messages():
     ).order_by(Message.created_at.desc()).all()
     
     # Count unread
-    unread_count = Message.query.filter_by(
-        recipient_type='teacher',
-        recipient_id=teacher.id,
-        is_read=False
-    ).count()
+    unread_count = unread_message_count("teacher", teacher.id)
+
+    # Resolve every msg.student in one query instead of a lazy load per row
+    students = get_loader(Student)
+    students.load_many(m.student_id for m in received + sent)
+    students.flush()
     
     return render_template(
         "teacher_messages.html",
@@ -5798,33 +6154,45 @@ def teacher_view_message(message_id):
         flash("Not authorized to view this message.", "error")
         return redirect("/teacher/messages")
     
-    # Mark as read if recipient
+    # Mark as read if recipient (single conditional UPDATE, no dirty-row flush)
     if is_recipient and not message.is_read:
-        message.is_read = True
+        db.session.execute(
+            update(Message)
+            .where(Message.id == message.id, Message.is_read == False)
+            .values(is_read=True)
+            .execution_options(synchronize_session=False)
+        )
         db.session.commit()
+        set_committed_value(message, "is_read", True)
+        invalidate_unread_count(("teacher", teacher.id))
     
     # Get student info
-    student = Student.query.get(message.student_id) if message.student_id else None
+    student = get_loader(Student).get(message.student_id)
     
-    # Get sender/recipient names
+    # Get sender/recipient names (one IN query per model, not one get per role)
+    parents = get_loader(Parent)
+    teachers = get_loader(Teacher)
+    for party_type, party_id in (
+        (message.sender_type, message.sender_id),
+        (message.recipient_type, message.recipient_id),
+    ):
+        (parents if party_type == 'parent' else teachers).load(party_id)
+
     if message.sender_type == 'parent':
-        sender = Parent.query.get(message.sender_id)
+        sender = parents.get(message.sender_id)
         sender_name = sender.name if sender else "Unknown Parent"
     else:
-        sender = Teacher.query.get(message.sender_id)
+        sender = teachers.get(message.sender_id)
         sender_name = sender.name if sender else "Unknown Teacher"
     
     if message.recipient_type == 'parent':
-        recipient = Parent.query.get(message.recipient_id)
+        recipient = parents.get(message.recipient_id)
         recipient_name = recipient.name if recipient else "Unknown Parent"
     else:
-        recipient = Teacher.query.get(message.recipient_id)
+        recipient = teachers.get(message.recipient_id)
         recipient_name = recipient.name if recipient else "Unknown Teacher"
     
-    # Parse progress report if exists
-    progress_report = None
-    if message.progress_report_json:
-        progress_report = json.loads(message.progress_report_json)
+    progress_report = message.progress_report
     
     return render_template(
         "view_message.html",
@@ -5871,6 +6239,7 @@ def teacher_compose_message():
         )
         db.session.add(message)
         db.session.commit()
+        invalidate_unread_count(("parent", student.parent_id))
         
         flash("Message sent successfully!", "info")
         return redirect("/teacher/messages")
@@ -5897,6 +6266,22 @@ def teacher_compose_message():
     )
 
 
+def send_progress_reports(reports):
+    """
+    Insert progress-report messages in one executemany and commit once.
+
+    Args:
+        reports: list of dicts with Message column values
+                 (sender_type, sender_id, recipient_type, recipient_id,
+                  student_id, subject, body, progress_report_json)
+    """
+    if not reports:
+        return
+    db.session.execute(insert(Message), reports)
+    db.session.commit()
+    invalidate_unread_count(*{(r["recipient_type"], r["recipient_id"]) for r in reports})
+
+
 @app.route("/teacher/send_progress_report/<int:student_id>", methods=["GET", "POST"])
 def teacher_send_progress_report(student_id):
     """Send automated progress report to parent."""
@@ -5939,18 +6324,16 @@ Recent Performance:
         body += f"\n{request.form.get('additional_notes', '').strip()}\n\nBest regards,\n{teacher.name}"
         
         # Create message with progress report attached
-        message = Message(
-            sender_type='teacher',
-            sender_id=teacher.id,
-            recipient_type='parent',
-            recipient_id=student.parent_id,
-            student_id=student.id,
-            subject=subject,
-            body=body,
-            progress_report_json=json.dumps(report_data),
-        )
-        db.session.add(message)
-        db.session.commit()
+        send_progress_reports([{
+            "sender_type": "teacher",
+            "sender_id": teacher.id,
+            "recipient_type": "parent",
+            "recipient_id": student.parent_id,
+            "student_id": student.id,
+            "subject": subject,
+            "body": body,
+            "progress_report_json": json.dumps(report_data),
+        }])
         
         flash(f"Progress report sent to {student.student_name}'s parent!", "info")
         return redirect("/teacher/messages")
@@ -5972,8 +6355,12 @@ Recent Performance:
 # TEACHER - TEACHER'S PET AI ASSISTANT (CONTINUED)
 # ============================================================
 
+TEACHERS_PET_CACHE_TTL = 3600          # seconds
+TEACHERS_PET_CACHE_MAX_HISTORY = 2     # longer chats rarely repeat exactly
+
 @csrf.exempt
 @app.route("/teacher/teachers_pet", methods=["POST"])
+@limiter.limit("30 per hour")  # Each uncached question is an OpenAI call
 def teachers_pet_assistant():
     """Teacher's Pet: AI assistant for teachers to ask questions about CozmicLearning and teaching."""
     teacher = get_current_teacher()
@@ -6020,6 +6407,23 @@ A: "Try these 3 quick wins: 1) Use gamification (tokens/XP motivate!), 2) Let th
 
 Keep it SHORT, HELPFUL, and HOPEFUL."""
 
+    # Exact-duplicate FAQ questions (short or no history) reuse a cached answer
+    cache_key = None
+    if len(history) <= TEACHERS_PET_CACHE_MAX_HISTORY:
+        digest = hashlib.md5(
+            (context_prompt + question + json.dumps(history[-2:], sort_keys=True)).encode("utf-8")
+        ).hexdigest()
+        cache_key = f"tp:{digest}"
+        cached_answer = cache_get(cache_key)
+        if cached_answer:
+            history.append({"role": "user", "content": question})
+            history.append({"role": "assistant", "content": cached_answer})
+            return jsonify({
+                "success": True,
+                "answer": cached_answer,
+                "history": history,
+            }), 200
+
     # Build conversation with history
     messages = [{"role": "system", "content": context_prompt}]
     
@@ -6031,16 +6435,19 @@ Keep it SHORT, HELPFUL, and HOPEFUL."""
     messages.append({"role": "user", "content": question})
 
     try:
-        from modules.shared_ai import get_client
         client = get_client()
         
-        response = client.responses.create(
+        response = ai_request(
+            client.responses.create,
             model="gpt-4.1-mini",
             max_output_tokens=800,
             input=messages,
         )
         
         answer = response.output_text.strip()
+
+        if cache_key and answer:
+            cache_set(cache_key, answer, TEACHERS_PET_CACHE_TTL)
         
         # Update history
         history.append({"role": "user", "content": question})
@@ -6059,44 +6466,124 @@ Keep it SHORT, HELPFUL, and HOPEFUL."""
 # STUDENT – TAKE AI–GENERATED DIFFERENTIATED ASSIGNMENT
 # ============================================================
 
+ASSIGNMENT_STEPS_TTL = 86400  # seconds; edits invalidate explicitly
+
+
+def _assignment_steps_key(practice_id: int) -> str:
+    return f"assignment:steps:{practice_id}"
+
+
+def invalidate_assignment_steps(practice_id: int) -> None:
+    """Drop the compiled steps for an assignment after its questions change."""
+    cache_delete(_assignment_steps_key(practice_id))
+
+
+def build_assignment_steps(questions) -> list:
+    """Compile teacher AssignedQuestion rows into practice-session steps."""
+    steps = []
+    for q in questions:
+        # Parse correct answers (handle comma-separated values and whitespace)
+        if q.correct_answer:
+            expected = [ans.strip() for ans in q.correct_answer.split(",") if ans.strip()]
+        else:
+            expected = []
+        
+        step = {
+            "prompt": q.question_text,
+            "type": q.question_type or "free",
+            "expected": expected,
+            "expected_norm": prepare_expected_answers(expected),
+            "hint": "",
+            "explanation": q.explanation or ""
+        }
+        
+        # Add choices for multiple choice questions
+        if q.question_type == "multiple_choice":
+            choices = []
+            if q.choice_a: choices.append(q.choice_a)
+            if q.choice_b: choices.append(q.choice_b)
+            if q.choice_c: choices.append(q.choice_c)
+            if q.choice_d: choices.append(q.choice_d)
+            step["choices"] = choices
+        
+        steps.append(step)
+    return steps
+
+
+ASSIGNMENT_PRACTICE_TTL = 6 * 3600  # seconds an in-progress mission is kept
+
+# In-progress missions can't be recomputed (an AI mission regenerates with
+# different questions), so they must outlive gunicorn's --max-requests
+# worker recycling. With Redis they live there; without it they stay in
+# the session like they used to, never in the per-process memory cache.
+MISSION_SESSION_KEY = "mission_state"
+
+
+def mission_state_get(key: str):
+    if get_redis() is None:
+        return (session.get(MISSION_SESSION_KEY) or {}).get(key)
+    return cache_get_json(key)
+
+
+def mission_state_set(key: str, value, ttl: int) -> None:
+    if get_redis() is None:
+        session.setdefault(MISSION_SESSION_KEY, {})[key] = value
+        session.modified = True
+        return
+    cache_set_json(key, value, ttl)
+
+
+def mission_state_clear(prefix: str) -> None:
+    """Drop session-held mission entries under `prefix` (Redis keys just expire)."""
+    store = session.get(MISSION_SESSION_KEY)
+    if store:
+        for key in [k for k in store if k.startswith(prefix)]:
+            del store[key]
+        session.modified = True
+
+
+def _assignment_practice_owner() -> str:
+    owner = session.get("student_id")
+    if not owner:
+        owner = session.setdefault("practice_sid", secrets.token_urlsafe(12))
+    return f"practice:{owner}:"
+
+
+def _assignment_practice_key(practice_id: int) -> str:
+    return f"{_assignment_practice_owner()}{practice_id}"
+
+
+def load_assignment_practice(practice_id: int):
+    """Return the in-progress mission for this user + assignment, or None."""
+    return mission_state_get(_assignment_practice_key(practice_id))
+
+
+def save_assignment_practice(practice_id: int, practice: dict) -> None:
+    """Persist the in-progress mission (steps + statuses)."""
+    mission_state_set(_assignment_practice_key(practice_id), practice, ASSIGNMENT_PRACTICE_TTL)
+
+
 @app.route("/assignment/<int:practice_id>/take", methods=["GET"])
 def assignment_take(practice_id):
     init_user()
 
-    assignment = AssignedPractice.query.get_or_404(practice_id)
+    # Teacher questions compile to the same steps for every student until edited
+    steps = cache_get_json(_assignment_steps_key(practice_id))
 
-    # Check if assignment has AssignedQuestion records
-    assigned_questions = assignment.questions or []
-    
-    if assigned_questions:
+    # On a cache miss, fetch the questions alongside the assignment
+    query = AssignedPractice.query
+    if not steps:
+        query = query.options(selectinload(AssignedPractice.questions))
+    assignment = query.get_or_404(practice_id)
+
+    if not steps:
+        # Check if assignment has AssignedQuestion records
+        steps = build_assignment_steps(assignment.questions or [])
+        if steps:
+            cache_set_json(_assignment_steps_key(practice_id), steps, ASSIGNMENT_STEPS_TTL)
+
+    if steps:
         # Use teacher's pre-defined questions
-        steps = []
-        for q in assigned_questions:
-            # Parse correct answers (handle comma-separated values and whitespace)
-            if q.correct_answer:
-                expected = [ans.strip() for ans in q.correct_answer.split(",") if ans.strip()]
-            else:
-                expected = []
-            
-            step = {
-                "prompt": q.question_text,
-                "type": q.question_type or "free",
-                "expected": expected,
-                "hint": "",
-                "explanation": q.explanation or ""
-            }
-            
-            # Add choices for multiple choice questions
-            if q.question_type == "multiple_choice":
-                choices = []
-                if q.choice_a: choices.append(q.choice_a)
-                if q.choice_b: choices.append(q.choice_b)
-                if q.choice_c: choices.append(q.choice_c)
-                if q.choice_d: choices.append(q.choice_d)
-                step["choices"] = choices
-            
-            steps.append(step)
-        
         practice = {
             "steps": steps,
             "final_message": "Great work! Review your answers."
@@ -6116,10 +6603,14 @@ def assignment_take(practice_id):
             differentiation_mode=differentiation,
         )
 
-    session["practice"] = practice
-    session["practice_step"] = 0
-    session["student_answers"] = []
-    session.modified = True
+    # With Redis the full mission lives server-side; the cookie fallback
+    # holds one assignment at a time, as before
+    # The step pointer and score travel with this assignment's mission, so
+    # switching between assignments can't carry one's position into another
+    practice["step_index"] = 0
+    practice["correct_count"] = 0
+    mission_state_clear(_assignment_practice_owner())
+    save_assignment_practice(practice_id, practice)
 
     return redirect(f"/assignment/{practice_id}/step")
 
@@ -6129,14 +6620,21 @@ def assignment_step(practice_id):
 
     assignment = AssignedPractice.query.get_or_404(practice_id)
 
-    practice = session.get("practice")
-    step_index = session.get("practice_step", 0)
+    practice = load_assignment_practice(practice_id)
 
     if not practice:
         return redirect(f"/assignment/{practice_id}/take")
 
-    steps = practice["steps"]
+    steps = practice.get("steps") or []
     total_steps = len(steps)
+    if not total_steps:
+        flash("This assignment has no questions yet.", "error")
+        return redirect("/student/assignments")
+
+    # A finished (or corrupt) pointer starts the mission over
+    step_index = practice.get("step_index", 0)
+    if not isinstance(step_index, int) or not 0 <= step_index < total_steps:
+        return redirect(f"/assignment/{practice_id}/take")
     step = steps[step_index]
 
     # ----------------------------------------------------
@@ -6174,11 +6672,9 @@ def assignment_step(practice_id):
         correct_answers = step.get("expected", [])
 
         # Use robust answer matching (handles numeric formats, case-insensitive, etc.)
-        is_correct = False
-        for expected in correct_answers:
-            if answers_match(student_answer, str(expected)):
-                is_correct = True
-                break
+        # against answers normalized once when the step was compiled
+        prepared = step.get("expected_norm") or prepare_expected_answers(correct_answers)
+        is_correct = answer_in_expected(student_answer, prepared)
 
         step["student_answer"] = student_answer
         step["status"] = "correct" if is_correct else "incorrect"
@@ -6187,14 +6683,16 @@ def assignment_step(practice_id):
         if not is_correct:
             app.logger.info(f"Assignment answer mismatch - User: '{student_answer}' | Expected: {correct_answers}")
 
-        session["student_answers"].append(student_answer)
-        session["practice_step"] = step_index + 1
+        practice["step_index"] = step_index + 1
+        if is_correct:
+            practice["correct_count"] = practice.get("correct_count", 0) + 1
+        save_assignment_practice(practice_id, practice)
 
         # -----------------------------
         # If final step → summary page
         # -----------------------------
         if step_index + 1 >= total_steps:
-            score = sum(1 for s in steps if s.get("status") == "correct")
+            score = practice.get("correct_count", 0)
             score_percent = round((score / total_steps) * 100, 1)
 
             return render_template(
@@ -6238,38 +6736,39 @@ def teacher_analytics_overview():
     else:
         classes = Class.query.filter_by(teacher_id=teacher.id).order_by(Class.class_name).all()
 
+    # One grouped query for every class: student + ability counts and
+    # assessment average/count (abilities are recomputed on write)
+    stats_by_class = {}
+    class_ids = [cls.id for cls in classes]
+    if class_ids:
+        ability = func.lower(Student.ability_level)
+        rows = (
+            db.session.query(
+                Class.id,
+                func.count(distinct(Student.id)),
+                func.count(distinct(case((ability == "struggling", Student.id)))),
+                func.count(distinct(case((ability == "on_level", Student.id)))),
+                func.count(distinct(case((ability == "advanced", Student.id)))),
+                func.avg(AssessmentResult.score_percent),
+                func.count(AssessmentResult.id),
+            )
+            .outerjoin(Student, Student.class_id == Class.id)
+            .outerjoin(AssessmentResult, AssessmentResult.student_id == Student.id)
+            .filter(Class.id.in_(class_ids))
+            .group_by(Class.id)
+            .all()
+        )
+        for class_id, *stats in rows:
+            stats_by_class[class_id] = stats
+
     # Build summary stats for each class
     class_summaries = []
     for cls in classes:
-        students = cls.students or []
-        total_students = len(students)
-        
-        # Recompute abilities
-        for s in students:
-            recompute_student_ability(s)
-        
-        # Ability distribution
-        struggling = sum(1 for s in students if (s.ability_level or "").lower() == "struggling")
-        on_level = sum(1 for s in students if (s.ability_level or "").lower() == "on_level")
-        advanced = sum(1 for s in students if (s.ability_level or "").lower() == "advanced")
-        
-        # Class average from recent assessments
-        recent_scores = (
-            db.session.query(func.avg(AssessmentResult.score_percent))
-            .join(Student, AssessmentResult.student_id == Student.id)
-            .filter(Student.class_id == cls.id)
-            .scalar()
+        total_students, struggling, on_level, advanced, avg_score, total_assessments = (
+            stats_by_class.get(cls.id, (0, 0, 0, 0, None, 0))
         )
-        class_avg = round(recent_scores, 1) if recent_scores else 0.0
-        
-        # Total assessments
-        total_assessments = (
-            db.session.query(func.count(AssessmentResult.id))
-            .join(Student, AssessmentResult.student_id == Student.id)
-            .filter(Student.class_id == cls.id)
-            .scalar()
-        ) or 0
-        
+        class_avg = round(avg_score, 1) if avg_score else 0.0
+
         class_summaries.append({
             "class": cls,
             "total_students": total_students,
@@ -6277,7 +6776,7 @@ def teacher_analytics_overview():
             "on_level": on_level,
             "advanced": advanced,
             "class_avg": class_avg,
-            "total_assessments": total_assessments,
+            "total_assessments": total_assessments or 0,
         })
     
     return render_template(
@@ -6288,21 +6787,45 @@ def teacher_analytics_overview():
     )
 
 
+CLASS_ANALYTICS_TTL = 300  # seconds; result/roster writes invalidate explicitly
+
+
+def _class_analytics_key(class_id: int) -> str:
+    return f"class_analytics:{class_id}"
+
+
+def invalidate_class_analytics(*class_ids) -> None:
+    """Drop cached analytics aggregates for classes whose results or roster changed."""
+    cache_delete(*[_class_analytics_key(cid) for cid in class_ids if cid])
+
+
 @app.route("/teacher/class/<int:class_id>/analytics")
 def teacher_class_analytics(class_id):
     teacher = get_current_teacher()
     if not teacher:
         return redirect("/teacher/login")
 
-    cls = Class.query.get(class_id)
+    cls = Class.query.options(selectinload(Class.students)).get(class_id)
     if not cls or (not is_owner(teacher) and cls.teacher_id != teacher.id):
         flash("Class not found or not authorized.", "error")
         return redirect("/teacher/dashboard")
 
+    # Abilities are recomputed when results are written, not on every view
     students = cls.students or []
 
-    for s in students:
-        recompute_student_ability(s)
+    cached = cache_get_json(_class_analytics_key(class_id))
+    if cached is not None:
+        return render_template(
+            "class_analytics.html",
+            cls=cls,
+            students=students,
+            subject_averages=cached["subject_averages"],
+            ability_counts=cached["ability_counts"],
+            topic_keys=cached["topic_keys"],
+            # JSON object keys are strings; the template looks rows up by student.id
+            matrix={int(sid): row for sid, row in cached["matrix"].items()},
+            is_owner=is_owner(teacher),
+        )
 
     # Subject-level averages
     subject_averages = {}
@@ -6327,10 +6850,22 @@ def teacher_class_analytics(class_id):
             ability_counts[lvl] = 0
         ability_counts[lvl] += 1
 
-    # Heatmap by topic
-    all_results = (
-        AssessmentResult.query.join(Student, AssessmentResult.student_id == Student.id)
+    # Heatmap by topic: the DB reduces every result row to one
+    # (student, subject, topic) sum/count; Python only merges the small matrix
+    subject_col = func.lower(func.trim(func.coalesce(AssessmentResult.subject, "")))
+    topic_col = func.trim(func.coalesce(AssessmentResult.topic, ""))
+    topic_rows = (
+        db.session.query(
+            AssessmentResult.student_id,
+            subject_col,
+            topic_col,
+            func.sum(func.coalesce(AssessmentResult.score_percent, 0.0)),
+            func.count(AssessmentResult.id),
+        )
+        .join(Student, AssessmentResult.student_id == Student.id)
         .filter(Student.class_id == class_id)
+        .group_by(AssessmentResult.student_id, subject_col, topic_col)
+        .order_by(func.min(AssessmentResult.id))
         .all()
     )
 
@@ -6338,20 +6873,18 @@ def teacher_class_analytics(class_id):
     topic_seen = set()
     agg = {}
 
-    for r in all_results:
-        subj = (r.subject or "").strip().lower() or "general"
-        topic = (r.topic or "").strip() or "General"
-        key = f"{subj.title()} | {topic}"
+    for student_id, subj, topic, score_sum, score_count in topic_rows:
+        key = f"{(subj or 'general').title()} | {topic or 'General'}"
 
         if key not in topic_seen:
             topic_seen.add(key)
             topic_keys.append(key)
 
-        idx = (r.student_id, key)
+        idx = (student_id, key)
         if idx not in agg:
             agg[idx] = {"sum": 0.0, "count": 0}
-        agg[idx]["sum"] += r.score_percent or 0.0
-        agg[idx]["count"] += 1
+        agg[idx]["sum"] += score_sum or 0.0
+        agg[idx]["count"] += score_count
 
     student_topic_matrix = {}
     for (student_id, key), data in agg.items():
@@ -6360,6 +6893,13 @@ def teacher_class_analytics(class_id):
             student_topic_matrix[student_id] = {}
         student_topic_matrix[student_id][key] = round(avg_score, 1)
 
+    cache_set_json(_class_analytics_key(class_id), {
+        "subject_averages": subject_averages,
+        "ability_counts": ability_counts,
+        "topic_keys": topic_keys,
+        "matrix": student_topic_matrix,
+    }, CLASS_ANALYTICS_TTL)
+
     return render_template(
         "class_analytics.html",
         cls=cls,
@@ -6386,7 +6926,11 @@ def teacher_record_result():
     num_questions = int(request.form.get("num_questions") or 1)
     difficulty_level = request.form.get("difficulty_level") or None
 
-    student = Student.query.get(student_id)
+    # Only the columns the ownership check, result row and recompute touch
+    student = Student.query.options(
+        load_only(Student.id, Student.class_id, Student.parent_id, Student.ability_level),
+        joinedload(Student.class_ref).load_only(Class.teacher_id),
+    ).get(student_id)
     if not student:
         flash("Student not found.", "error")
         return redirect("/teacher/dashboard")
@@ -6407,13 +6951,18 @@ def teacher_record_result():
         difficulty_level=difficulty_level or student.ability_level,
     )
 
-    db.session.add(result)
-    db.session.commit()
+    class_id = student.class_id
+    parent_id = student.parent_id
 
+    # recompute_student_ability autoflushes the new row and commits both
+    # together, so the partially loaded student is never expired and refetched
+    db.session.add(result)
     recompute_student_ability(student)
+    invalidate_class_analytics(class_id)
+    invalidate_weekly_report(parent_id)
 
     flash("Result recorded.", "info")
-    return redirect(f"/teacher/class/{student.class_id}/analytics")
+    return redirect(f"/teacher/class/{class_id}/analytics")
 
 
 @app.route("/teacher/student/<int:student_id>/report")
@@ -6422,7 +6971,7 @@ def teacher_student_report(student_id):
     if not teacher:
         return redirect("/teacher/login")
 
-    student = Student.query.get(student_id)
+    student = Student.query.options(joinedload(Student.class_ref)).get(student_id)
     if not student:
         flash("Student not found.", "error")
         return redirect("/teacher/dashboard")
@@ -6520,6 +7069,48 @@ def ask_question():
     )
 
 
+def notify_parent_high_risk(student_id, log_id, question, reason):
+    """Email a student's parent about blocked high-risk content (runs on mail_executor)."""
+    with app.app_context():
+        try:
+            student = Student.query.options(joinedload(Student.parent_ref)).get(student_id)
+            parent = student.parent_ref if student else None
+            if not parent:
+                return
+
+            from flask_mail import Message as EmailMessage
+            msg = EmailMessage(
+                subject=f"⚠️ URGENT: High-Risk Content Alert for {student.student_name}",
+                sender=app.config["MAIL_DEFAULT_SENDER"],
+                recipients=[parent.email]
+            )
+            msg.body = f"""URGENT ALERT
+
+Your student {student.student_name} attempted to submit high-risk content:
+
+Question: "{question[:200]}"
+Date: {datetime.utcnow().strftime('%B %d, %Y at %I:%M %p')}
+Severity: HIGH
+Reason: {reason}
+
+This content was automatically blocked and flagged for immediate review.
+
+Please discuss appropriate online behavior with your student.
+
+CozmicLearning Team
+"""
+            mail.send(msg)
+
+            db.session.execute(
+                update(QuestionLog)
+                .where(QuestionLog.id == log_id)
+                .values(parent_notified=True, parent_notified_at=datetime.utcnow())
+            )
+            db.session.commit()
+        except Exception as e:
+            app.logger.error(f"Failed to send high-risk notification: {e}")
+
+
 @app.route("/subject", methods=["POST"])
 def subject_answer():
     init_user()
@@ -6578,11 +7169,11 @@ def subject_answer():
             flagged=moderation_result.get("flagged", False),
             allowed=moderation_result.get("allowed", True),
             moderation_reason=moderation_result.get("reason"),
-            moderation_data_json=str(moderation_result.get("moderation_data", {})),
+            moderation_data_json=moderation_json(moderation_result),
             severity=moderation_result.get("severity", "low")
         )
+        # Committed below with the block outcome, redirect hand-off or AI response
         db.session.add(log_entry)
-        db.session.commit()
     
     # If content was blocked, show error and don't process
     if not moderation_result["allowed"]:
@@ -6591,59 +7182,42 @@ def subject_answer():
             flash(warning, "warning")
         flash(moderation_result.get("reason", "Your question could not be processed."), "error")
         
-        # High severity = notify parent immediately
-        if moderation_result.get("severity") == "high":
-            try:
-                student = Student.query.get(student_id)
-                if student and student.parent_id:
-                    parent = Parent.query.get(student.parent_id)
-                    if parent:
-                        # Send immediate notification
-                        from flask_mail import Message as EmailMessage
-                        msg = EmailMessage(
-                            subject=f"⚠️ URGENT: High-Risk Content Alert for {student.student_name}",
-                            sender=app.config["MAIL_DEFAULT_SENDER"],
-                            recipients=[parent.email]
-                        )
-                        msg.body = f"""URGENT ALERT
-
-Your student {student.student_name} attempted to submit high-risk content:
-
-Question: "{question[:200]}"
-Date: {datetime.utcnow().strftime('%B %d, %Y at %I:%M %p')}
-Severity: HIGH
-Reason: {moderation_result.get('reason')}
-
-This content was automatically blocked and flagged for immediate review.
-
-Please discuss appropriate online behavior with your student.
+        if log_entry:
+            db.session.commit()
 
-CozmicLearning Team
-"""
-                        mail.send(msg)
-                        if log_entry:
-                            log_entry.parent_notified = True
-                            log_entry.parent_notified_at = datetime.utcnow()
-                            db.session.commit()
-            except Exception as e:
-                app.logger.error(f"Failed to send high-risk notification: {e}")
+            # High severity = notify parent immediately, off the request thread
+            if moderation_result.get("severity") == "high":
+                mail_executor.submit(
+                    notify_parent_high_risk,
+                    student_id,
+                    log_entry.id,
+                    question,
+                    moderation_result.get("reason"),
+                )
         
         return redirect("/subjects")
 
     session["grade"] = grade
 
-    session["progress"].setdefault(subject, {"questions": 0, "correct": 0})
-    session["progress"][subject]["questions"] += 1
-
-    if subject == "power_grid":
-        return redirect(f"/ask-question?subject=power_grid&grade={grade}")
-
     func = subject_map.get(subject)
     if func is None:
         flash("Unknown subject selected.", "error")
         return redirect("/subjects")
 
+    # Count only known subjects, so arbitrary form values can't grow the
+    # session; the in-place change is saved by the session.modified below
+    progress = session["progress"]
+    counts = progress.get(subject)
+    if counts is None:
+        counts = progress[subject] = {"questions": 0, "correct": 0}
+    counts["questions"] += 1
+
     result = func(question, grade, character)
+    if isinstance(result, tuple) and result[0] == "redirect":
+        # Hand-off subjects (PowerGrid) still keep their moderated question log
+        if log_entry:
+            db.session.commit()
+        return redirect(result[1])
     answer = result.get("raw_text") if isinstance(result, dict) else result
 
     # Parse answer into sections for enhanced display
@@ -6652,7 +7226,7 @@ CozmicLearning Team
 
     # Update log with AI response (only if log_entry exists)
     if log_entry:
-        log_entry.ai_response = answer[:5000]  # Store first 5000 chars
+        log_entry.ai_response = log_response_text(answer)
         db.session.commit()
 
     session["conversation"] = []
@@ -6733,14 +7307,15 @@ def followup_message():
         flagged=moderation_result.get("flagged", False),
         allowed=moderation_result.get("allowed", True),
         moderation_reason=moderation_result.get("reason"),
-        moderation_data_json=str(moderation_result.get("moderation_data", {})),
+        moderation_data_json=moderation_json(moderation_result),
         severity=moderation_result.get("severity", "low")
     )
+    # Committed once, together with the AI response or block outcome
     db.session.add(log_entry)
-    db.session.commit()
     
     # If blocked, return error
     if not moderation_result["allowed"]:
+        db.session.commit()
         return jsonify({
             "error": moderation_result.get("reason", "Message could not be processed."),
             "warning": moderation_result.get("warning"),
@@ -6754,7 +7329,7 @@ def followup_message():
     reply_text = reply.get("raw_text") if isinstance(reply, dict) else reply
     
     # Update log with AI response
-    log_entry.ai_response = reply_text[:5000]
+    log_entry.ai_response = log_response_text(reply_text)
     db.session.commit()
 
     conversation.append({"role": "assistant", "content": reply_text})
@@ -6767,6 +7342,25 @@ def followup_message():
     return jsonify({"reply": reply_text})
 
 
+DEEP_STUDY_MAX_TURNS = 20  # turns of chat history sent back to the tutor
+
+DEEP_STUDY_PROMPT = """
+You are the DEEP STUDY TUTOR.
+Warm, patient, conversational.
+
+GRADE LEVEL: {grade}
+
+Conversation so far:
+{dialogue}
+
+Rules:
+• Only answer last student message
+• No long essays
+• No repeating study guide
+• Encourage deeper thinking
+"""
+
+
 @app.route("/deep_study_message", methods=["POST"])
 @csrf.exempt
 def deep_study_message():
@@ -6804,14 +7398,15 @@ def deep_study_message():
         flagged=moderation_result.get("flagged", False),
         allowed=moderation_result.get("allowed", True),
         moderation_reason=moderation_result.get("reason"),
-        moderation_data_json=str(moderation_result.get("moderation_data", {})),
+        moderation_data_json=moderation_json(moderation_result),
         severity=moderation_result.get("severity", "low")
     )
+    # Committed once, together with the AI response or block outcome
     db.session.add(log_entry)
-    db.session.commit()
     
     # If blocked, return error
     if not moderation_result["allowed"]:
+        db.session.commit()
         return jsonify({
             "error": moderation_result.get("reason", "Message could not be processed."),
             "warning": moderation_result.get("warning"),
@@ -6821,32 +7416,19 @@ def deep_study_message():
     conversation = session.get("deep_study_chat", [])
     conversation.append({"role": "user", "content": message})
 
-    dialogue = ""
-    for turn in conversation:
-        speaker = "Student" if turn["role"] == "user" else "Tutor"
-        dialogue += f"{speaker}: {turn['content']}\n"
-
-    prompt = f"""
-You are the DEEP STUDY TUTOR.
-Warm, patient, conversational.
-
-GRADE LEVEL: {grade}
-
-Conversation so far:
-{dialogue}
+    # Single join over the most recent turns (no O(n^2) string growth, bounded prompt size)
+    dialogue = "".join(
+        f"{'Student' if turn['role'] == 'user' else 'Tutor'}: {turn['content']}\n"
+        for turn in conversation[-DEEP_STUDY_MAX_TURNS:]
+    )
 
-Rules:
-• Only answer last student message
-• No long essays
-• No repeating study guide
-• Encourage deeper thinking
-"""
+    prompt = DEEP_STUDY_PROMPT.format(grade=grade, dialogue=dialogue)
 
     reply = study_buddy_ai(prompt, grade, character)
     reply_text = reply.get("raw_text") if isinstance(reply, dict) else reply
     
     # Update log with AI response
-    log_entry.ai_response = reply_text[:5000]
+    log_entry.ai_response = log_response_text(reply_text)
     db.session.commit()
 
     conversation.append({"role": "assistant", "content": reply_text})
@@ -6863,6 +7445,288 @@ Rules:
 # POWERGRID STUDY GUIDE + PDF
 # ============================================================
 
+# Ingestion/PDF libraries are imported once here instead of inside every
+# submission. Each is optional: the branch that needs a missing one reports it.
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:
+    lxml_html = None
+
+try:
+    from youtube_transcript_api import YouTubeTranscriptApi
+except ImportError:
+    YouTubeTranscriptApi = None
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+try:
+    from PyPDF2 import PdfReader
+except ImportError:
+    PdfReader = None
+
+try:
+    from docx import Document
+except ImportError:
+    Document = None
+
+try:
+    import pytesseract
+    from PIL import Image
+except ImportError:
+    pytesseract = Image = None
+
+try:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+except ImportError:
+    SimpleDocTemplate = None
+
+URL_IMPORT_MAX_BYTES = 512_000
+# watch?v=, youtu.be/, /shorts/ and /embed/ links
+_YT_ID_RE = re.compile(r"(?:v=|youtu\.be/|/shorts/|/embed/)([0-9A-Za-z_-]{11})")
+URL_IMPORT_MAX_CHARS = 5000
+
+# Text nodes inside content tags, skipping anything under script/style/noscript
+_URL_TEXT_XPATH = etree.XPath(
+    "//text()[(ancestor::p or ancestor::h1 or ancestor::h2 or ancestor::h3 or ancestor::h4"
+    " or ancestor::li or ancestor::article or ancestor::main)"
+    " and not(ancestor::script or ancestor::style or ancestor::noscript)]"
+) if lxml_html is not None else None
+OCR_MAX_EDGE = 2000  # px; plenty for document text
+POWERGRID_SOURCE_MAX_CHARS = 20_000  # per source, before the combined cap
+POWERGRID_COMBINED_MAX_CHARS = 15_000
+POWERGRID_FILE_EXTS = (".pdf", ".docx", ".doc", ".png", ".jpg", ".jpeg", ".bmp", ".tiff")
+POWERGRID_SOURCE_TTL = 3600  # seconds; imported pages/transcripts are effectively static
+
+
+def _bounded_join(parts, sep: str, limit: int):
+    """
+    sep.join(parts)[:limit] without building the full string.
+
+    `parts` may be a generator; it stops being consumed once the limit is hit.
+    Returns (text, truncated).
+    """
+    buf = io.StringIO()
+    for i, part in enumerate(parts):
+        chunk = part if i == 0 else sep + part
+        room = limit - buf.tell()
+        if len(chunk) > room:
+            buf.write(chunk[:room])
+            return buf.getvalue(), True
+        buf.write(chunk)
+    return buf.getvalue(), False
+
+
+def _powergrid_source_key(kind: str, ref: str) -> str:
+    return f"powergrid:{kind}:{hashlib.md5(ref.encode('utf-8')).hexdigest()}"
+
+
+def _import_url(url_input: str) -> str:
+    """Fetch a web page for PowerGrid and return its text chunk (or an error line)."""
+    cache_key = _powergrid_source_key("url", url_input)
+    cached = cache_get(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        if lxml_html is None:
+            raise ImportError("lxml is not installed")
+        # Stream and stop at URL_IMPORT_MAX_BYTES; only 5000 chars of text are kept anyway
+        with get_http_session().get(url_input, timeout=HTTP_TIMEOUT, stream=True) as response:
+            content_type = response.headers.get("Content-Type", "").lower()
+            if not content_type.startswith(("text/html", "application/xhtml")):
+                raise ValueError(f"unsupported content type '{content_type or 'unknown'}'")
+            content = response.raw.read(URL_IMPORT_MAX_BYTES, decode_content=True)
+        # Trust the charset only when the server declared one (requests
+        # otherwise guesses ISO-8859-1 for text/html). Without one, take
+        # valid UTF-8 as UTF-8 and leave anything else to lxml's <meta> sniffing.
+        encoding = response.encoding if "charset=" in content_type else None
+        if encoding is None:
+            try:
+                # Incremental decode tolerates a character cut off by the byte cap
+                codecs.getincrementaldecoder("utf-8")().decode(content)
+                encoding = "utf-8"
+            except UnicodeDecodeError:
+                pass
+        parser = lxml_html.HTMLParser(encoding=encoding) if encoding else None
+        tree = lxml_html.document_fromstring(content, parser=parser)
+
+        # Walk lxml text nodes directly and stop once we have enough
+        lines = []
+        length = 0
+        for text in _URL_TEXT_XPATH(tree):
+            text = text.strip()
+            if text:
+                lines.append(text)
+                length += len(text) + 1
+                if length >= URL_IMPORT_MAX_CHARS:
+                    break
+        web_text = "\n".join(lines)
+        part = f"--- Content from {url_input} ---\n{web_text[:URL_IMPORT_MAX_CHARS]}"
+        cache_set(cache_key, part, POWERGRID_SOURCE_TTL)
+        return part
+    except Exception as e:
+        app.logger.error(f"URL import error: {e}")
+        return f"Could not import from URL: {str(e)}"
+
+
+def _import_youtube_transcript(youtube_url: str):
+    """Return the PowerGrid transcript chunk for a YouTube link, or None if no video id."""
+    try:
+        if YouTubeTranscriptApi is None:
+            raise ImportError("youtube-transcript-api is not installed")
+        # Extract video ID
+        video_id_match = _YT_ID_RE.search(youtube_url)
+        if video_id_match:
+            video_id = video_id_match.group(1)
+            cache_key = _powergrid_source_key("youtube", video_id)
+            cached = cache_get(cache_key)
+            if cached is not None:
+                return cached
+
+            transcript = YouTubeTranscriptApi.get_transcript(video_id)
+            transcript_text, _ = _bounded_join(
+                (entry['text'] for entry in transcript), ' ', POWERGRID_SOURCE_MAX_CHARS
+            )
+            part = f"--- YouTube Transcript ---\n{transcript_text}"
+            cache_set(cache_key, part, POWERGRID_SOURCE_TTL)
+            return part
+    except Exception as e:
+        app.logger.error(f"YouTube transcript error: {e}")
+        return f"Could not extract YouTube transcript: {str(e)}"
+    return None
+
+
+def _extract_pdf_text(path: str) -> str:
+    """PDF text via PyMuPDF (C, releases the GIL); PyPDF2 if fitz is missing or fails."""
+    if fitz is not None:
+        try:
+            with fitz.open(path) as doc:
+                # Pages past the per-source cap are never decoded
+                text, _ = _bounded_join(
+                    (page.get_text("text") for page in doc), "\n", POWERGRID_SOURCE_MAX_CHARS
+                )
+                return text
+        except Exception as e:
+            app.logger.warning(f"PyMuPDF extraction failed, falling back to PyPDF2: {e}")
+
+    if PdfReader is None:
+        raise ImportError("no PDF library is installed")
+    pdf = PdfReader(path)
+    text, _ = _bounded_join(
+        (page.extract_text() or "" for page in pdf.pages), "\n", POWERGRID_SOURCE_MAX_CHARS
+    )
+    return text
+
+
+def _spool_upload(uploaded) -> str:
+    """Copy an upload to a private temp file in 1 MB chunks and return its path."""
+    suffix = os.path.splitext(uploaded.filename)[1].lower()
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        shutil.copyfileobj(uploaded.stream, tmp, length=1 << 20)
+        return tmp.name
+
+
+# Study-guide PDFs render off the request thread; the download route checks
+# _pdf_jobs so it can answer "still generating" instead of "not found"
+pdf_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pdf")
+_pdf_jobs = {}  # {pdf_path: Future}
+
+
+def _render_study_guide_pdf(study_guide: str, pdf_path: str) -> None:
+    """Build the study-guide PDF, publishing it at pdf_path only once complete."""
+    tmp_path = f"{pdf_path}.part"
+    try:
+        # Platypus lays out and paginates the whole guide in one pass
+        doc = SimpleDocTemplate(tmp_path, pagesize=letter, topMargin=40)
+        styles = getSampleStyleSheet()
+        story = [
+            Paragraph("PowerGrid Master Study Guide", styles["Heading1"]),
+            Paragraph(f"Generated: {datetime.now().strftime('%B %d, %Y')}", styles["Normal"]),
+            Spacer(1, 12),
+        ]
+        for para in study_guide.split("\n\n"):
+            if para.strip():
+                story.append(Paragraph(html_escape(para).replace("\n", "<br/>"), styles["BodyText"]))
+        doc.build(story)
+        os.replace(tmp_path, pdf_path)
+    except Exception as e:
+        app.logger.error(f"PDF generation error: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+    finally:
+        _pdf_jobs.pop(pdf_path, None)
+
+
+def _process_upload(uploaded) -> str:
+    """Return one PowerGrid upload's extracted text chunk."""
+    ext = uploaded.filename.lower()
+    path = None
+
+    try:
+        if ext.endswith(".txt"):
+            # Plain text never needs to touch disk; UTF-8 is at most 4 bytes a char
+            raw = uploaded.stream.read(POWERGRID_SOURCE_MAX_CHARS * 4)
+            text = raw.decode("utf-8", errors="replace")[:POWERGRID_SOURCE_MAX_CHARS]
+            return f"--- From {uploaded.filename} ---\n{text}"
+
+        if not ext.endswith(POWERGRID_FILE_EXTS):
+            return f"Unsupported file type: {uploaded.filename}"
+
+        # PDF/DOCX/image parsers want a path
+        path = _spool_upload(uploaded)
+
+        if ext.endswith(".pdf"):
+            try:
+                pdf_text = _extract_pdf_text(path)
+                return f"--- From {uploaded.filename} ---\n{pdf_text}"
+            except Exception as e:
+                return f"Could not read PDF {uploaded.filename}: {str(e)}"
+        
+        elif ext.endswith((".docx", ".doc")):
+            try:
+                if Document is None:
+                    raise ImportError("python-docx is not installed")
+                doc = Document(path)
+                docx_text, _ = _bounded_join(
+                    (para.text for para in doc.paragraphs), "\n", POWERGRID_SOURCE_MAX_CHARS
+                )
+                return f"--- From {uploaded.filename} ---\n{docx_text}"
+            except Exception as e:
+                return f"Could not read DOCX {uploaded.filename}: {str(e)}"
+        
+        else:
+            try:
+                if pytesseract is None:
+                    raise ImportError("pytesseract is not installed")
+                img = Image.open(path)
+                # Tesseract is O(pixels): let JPEGs decode at a reduced DCT scale,
+                # then cap the long edge at OCR_MAX_EDGE in grayscale
+                img.draft("L", (OCR_MAX_EDGE, OCR_MAX_EDGE))
+                img.thumbnail((OCR_MAX_EDGE, OCR_MAX_EDGE), Image.LANCZOS)
+                img = img.convert("L")
+                ocr_text = pytesseract.image_to_string(img, config="--oem 1 --psm 6")[:POWERGRID_SOURCE_MAX_CHARS]
+                return f"--- OCR from {uploaded.filename} ---\n{ocr_text}"
+            except Exception as e:
+                return f"Could not OCR image {uploaded.filename}: {str(e)}"
+            
+    except Exception as e:
+        app.logger.error(f"File processing error for {uploaded.filename}: {e}")
+        return f"Error processing {uploaded.filename}"
+    finally:
+        if path:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
 @app.route("/powergrid_submit", methods=["POST"])
 @csrf.exempt
 @limiter.limit("20 per hour")  # PowerGrid is computationally expensive
@@ -6882,87 +7746,27 @@ def powergrid_submit():
 
     text_parts = []
     
-    # Process URL import
-    if url_input:
-        try:
-            import requests
-            from bs4 import BeautifulSoup
-            response = requests.get(url_input, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            # Extract main content (simplified - would need better parsing)
-            for script in soup(["script", "style"]):
-                script.decompose()
-            web_text = soup.get_text()
-            text_parts.append(f"--- Content from {url_input} ---\n{web_text[:5000]}")  # Limit to 5000 chars
-        except Exception as e:
-            app.logger.error(f"URL import error: {e}")
-            text_parts.append(f"Could not import from URL: {str(e)}")
-    
-    # Process YouTube transcript
-    if youtube_url:
-        try:
-            from youtube_transcript_api import YouTubeTranscriptApi
-            import re
-            # Extract video ID
-            video_id_match = re.search(r'(?:v=|\/)([0-9A-Za-z_-]{11}).*', youtube_url)
-            if video_id_match:
-                video_id = video_id_match.group(1)
-                transcript = YouTubeTranscriptApi.get_transcript(video_id)
-                transcript_text = ' '.join([entry['text'] for entry in transcript])
-                text_parts.append(f"--- YouTube Transcript ---\n{transcript_text}")
-        except Exception as e:
-            app.logger.error(f"YouTube transcript error: {e}")
-            text_parts.append(f"Could not extract YouTube transcript: {str(e)}")
-    
-    # Process uploaded files (multiple files)
-    if uploaded_files and uploaded_files[0].filename:
-        for uploaded in uploaded_files:
-            if not uploaded.filename:
-                continue
-                
-            ext = uploaded.filename.lower()
-            path = os.path.join("/tmp", uploaded.filename)
-            uploaded.save(path)
-
-            try:
-                if ext.endswith(".txt"):
-                    with open(path, "r", encoding='utf-8') as f:
-                        text_parts.append(f"--- From {uploaded.filename} ---\n{f.read()}")
-                
-                elif ext.endswith(".pdf"):
-                    try:
-                        from PyPDF2 import PdfReader
-                        pdf = PdfReader(path)
-                        pdf_text = "\n".join(page.extract_text() or "" for page in pdf.pages)
-                        text_parts.append(f"--- From {uploaded.filename} ---\n{pdf_text}")
-                    except Exception as e:
-                        text_parts.append(f"Could not read PDF {uploaded.filename}: {str(e)}")
-                
-                elif ext.endswith((".docx", ".doc")):
-                    try:
-                        from docx import Document
-                        doc = Document(path)
-                        docx_text = "\n".join([para.text for para in doc.paragraphs])
-                        text_parts.append(f"--- From {uploaded.filename} ---\n{docx_text}")
-                    except Exception as e:
-                        text_parts.append(f"Could not read DOCX {uploaded.filename}: {str(e)}")
-                
-                elif ext.endswith((".png", ".jpg", ".jpeg", ".bmp", ".tiff")):
-                    try:
-                        import pytesseract
-                        from PIL import Image
-                        img = Image.open(path)
-                        ocr_text = pytesseract.image_to_string(img)
-                        text_parts.append(f"--- OCR from {uploaded.filename} ---\n{ocr_text}")
-                    except Exception as e:
-                        text_parts.append(f"Could not OCR image {uploaded.filename}: {str(e)}")
-                
-                else:
-                    text_parts.append(f"Unsupported file type: {uploaded.filename}")
-                    
-            except Exception as e:
-                app.logger.error(f"File processing error for {uploaded.filename}: {e}")
-                text_parts.append(f"Error processing {uploaded.filename}")
+    # URL, YouTube and file ingestion are independent and mostly I/O, so run
+    # them side by side; parts are still assembled in URL → YouTube → files order
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        url_future = executor.submit(_import_url, url_input) if url_input else None
+        youtube_future = executor.submit(_import_youtube_transcript, youtube_url) if youtube_url else None
+
+        # Process uploaded files (multiple files). Extraction is PDF/DOCX/OCR work
+        # that releases the GIL, so files are read side by side; map keeps order.
+        file_parts = []
+        uploads = [u for u in uploaded_files if u.filename]
+        if uploads:
+            with ThreadPoolExecutor(max_workers=min(8, len(uploads))) as file_executor:
+                file_parts = list(file_executor.map(_process_upload, uploads))
+
+        if url_future:
+            text_parts.append(url_future.result())
+        if youtube_future:
+            youtube_part = youtube_future.result()
+            if youtube_part:
+                text_parts.append(youtube_part)
+        text_parts.extend(file_parts)
     
     # Add manual topic if provided
     if topic:
@@ -6981,14 +7785,15 @@ def powergrid_submit():
             flagged=moderation_result.get("flagged", False),
             allowed=moderation_result.get("allowed", True),
             moderation_reason=moderation_result.get("reason"),
-            moderation_data_json=str(moderation_result.get("moderation_data", {})),
+            moderation_data_json=moderation_json(moderation_result),
             severity=moderation_result.get("severity", "low")
         )
+        # Committed once below, together with the study guide or block outcome
         db.session.add(log_entry)
-        db.session.commit()
         
         # If blocked, redirect with error
         if not moderation_result["allowed"]:
+            db.session.commit()
             warning = moderation_result.get("warning")
             if warning:
                 flash(warning, "warning")
@@ -6999,10 +7804,10 @@ def powergrid_submit():
     
     # Combine all text sources with length limits to prevent memory issues
     if text_parts:
-        combined_text = "\n\n".join(text_parts)
         # Limit total input to 15000 characters to prevent timeout/memory issues
-        if len(combined_text) > 15000:
-            combined_text = combined_text[:15000] + "\n\n[Content truncated due to length...]"
+        combined_text, truncated = _bounded_join(text_parts, "\n\n", POWERGRID_COMBINED_MAX_CHARS)
+        if truncated:
+            combined_text += "\n\n[Content truncated due to length...]"
     else:
         combined_text = "No content provided."
 
@@ -7014,48 +7819,17 @@ def powergrid_submit():
     
     # Update log with AI response if topic was provided
     if topic and 'log_entry' in locals():
-        log_entry.ai_response = study_guide[:5000]
+        log_entry.ai_response = log_response_text(study_guide)
         db.session.commit()
 
-    # Generate PDF
-    import uuid
-    from textwrap import wrap
-
-    pdf_path = f"/tmp/study_guide_{uuid.uuid4().hex}.pdf"
-
-    try:
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib.units import inch
-
-        c = canvas.Canvas(pdf_path, pagesize=letter)
-        width, height = letter
-        y = height - 50
-
-        # Header
-        c.setFont("Helvetica-Bold", 16)
-        c.drawString(40, y, "PowerGrid Master Study Guide")
-        y -= 30
-        c.setFont("Helvetica", 10)
-        c.drawString(40, y, f"Generated: {datetime.now().strftime('%B %d, %Y')}")
-        y -= 30
-
-        # Content
-        c.setFont("Helvetica", 11)
-        for line in study_guide.split("\n"):
-            for wrapped in wrap(line if line else " ", 95):
-                if y < 40:
-                    c.showPage()
-                    y = height - 50
-                    c.setFont("Helvetica", 11)
-                c.drawString(40, y, wrapped)
-                y -= 15
-
-        c.save()
+    # Generate PDF in the background; /download_study_guide waits for it
+    if SimpleDocTemplate is not None:
+        pdf_path = f"/tmp/study_guide_{uuid.uuid4().hex}.pdf"
+        _pdf_jobs[pdf_path] = pdf_executor.submit(_render_study_guide_pdf, study_guide, pdf_path)
         session["study_pdf"] = pdf_path
         pdf_url = "/download_study_guide"
-    except Exception as e:
-        app.logger.error(f"PDF generation error: {e}")
+    else:
+        app.logger.error("PDF generation error: reportlab is not installed")
         pdf_url = None
 
     session["conversation"] = []
@@ -7074,9 +7848,27 @@ def powergrid_submit():
     )
 
 
+# Browsers don't retry a 202 on their own, so the pending page reloads
+# itself until the PDF is ready and the download starts
+STUDY_GUIDE_PENDING_HTML = """<!doctype html>
+<html><head><meta charset="utf-8"><meta http-equiv="refresh" content="2">
+<title>Preparing your study guide…</title></head>
+<body style="font-family: sans-serif; text-align: center; padding: 60px;">
+<h2>Preparing your study guide PDF…</h2>
+<p>Your download will start automatically in a moment.</p>
+</body></html>"""
+
+
 @app.route("/download_study_guide")
 def download_study_guide():
     pdf = session.get("study_pdf")
+    if pdf and not os.path.exists(pdf):
+        job = _pdf_jobs.get(pdf)
+        if job is not None and not job.done():
+            response = make_response(STUDY_GUIDE_PENDING_HTML, 202)
+            response.headers["Refresh"] = "2"
+            response.headers["Retry-After"] = "2"
+            return response
     if not pdf or not os.path.exists(pdf):
         return "PDF not found."
     return send_file(pdf, as_attachment=True)
@@ -7086,6 +7878,49 @@ def download_study_guide():
 # GENERIC PRACTICE MODE (NOT TIED TO ASSIGNMENTS)
 # ============================================================
 
+# The mission, per-question progress and per-question tutor chat are kept
+# under separate mission-state keys, so with Redis each click rewrites only
+# the part it touched instead of re-signing the whole mission into the
+# session cookie (without Redis they stay in the session; see mission_state_get).
+PRACTICE_MISSION_TTL = ASSIGNMENT_PRACTICE_TTL
+
+
+def _practice_key(*parts) -> str:
+    mission = session.get("practice_mission") or "none"
+    return ":".join(["practice", "mission", mission, *map(str, parts)])
+
+
+def _blank_practice_state() -> dict:
+    return {"attempts": 0, "status": "unanswered", "last_answer": ""}
+
+
+def load_practice_mission():
+    """Return the active generic practice mission (steps, topic, final_message) or None."""
+    if not session.get("practice_mission"):
+        return None
+    return mission_state_get(_practice_key())
+
+
+def load_practice_progress(index: int) -> list:
+    """Per-question states for the active mission, padded through `index`."""
+    progress = mission_state_get(_practice_key("progress")) or []
+    if index >= len(progress):
+        progress.extend(_blank_practice_state() for _ in range(index - len(progress) + 1))
+    return progress
+
+
+def save_practice_progress(progress: list) -> None:
+    mission_state_set(_practice_key("progress"), progress, PRACTICE_MISSION_TTL)
+
+
+def load_practice_chat(index: int) -> list:
+    return mission_state_get(_practice_key("chat", index)) or []
+
+
+def save_practice_chat(index: int, chat: list) -> None:
+    mission_state_set(_practice_key("chat", index), chat, PRACTICE_MISSION_TTL)
+
+
 @app.route("/practice")
 def practice():
     init_user()
@@ -7134,17 +7969,18 @@ def start_practice():
             }
         )
 
-    progress = []
-    for _ in steps:
-        progress.append(
-            {"attempts": 0, "status": "unanswered", "last_answer": "", "chat": []}
-        )
+    # Normalize expected answers once so each answer check is a set lookup
+    for step in steps:
+        step["expected_norm"] = prepare_expected_answers(step.get("expected", []))
 
-    session["practice"] = practice_data
-    session["practice_progress"] = progress
+    # New mission id: the previous mission's Redis keys simply expire, and
+    # its session-held copy (no Redis) is dropped
+    mission_state_clear("practice:mission:")
+    session["practice_mission"] = secrets.token_urlsafe(12)
     session["practice_step"] = 0
     session["practice_attempts"] = 0
-    session.modified = True
+    mission_state_set(_practice_key(), practice_data, PRACTICE_MISSION_TTL)
+    save_practice_progress([_blank_practice_state() for _ in steps])
 
     first = steps[0]
 
@@ -7171,8 +8007,7 @@ def navigate_question():
     data = request.get_json() or {}
     index = int(data.get("index", 0))
 
-    practice_data = session.get("practice")
-    progress = session.get("practice_progress", [])
+    practice_data = load_practice_mission()
     character = session.get("character", "everly")
 
     if not practice_data:
@@ -7193,24 +8028,9 @@ def navigate_question():
         index = total - 1
 
     step = steps[index]
-    if index >= len(progress):
-        progress.extend(
-            [
-                {
-                    "attempts": 0,
-                    "status": "unanswered",
-                    "last_answer": "",
-                    "chat": [],
-                }
-                for _ in range(index - len(progress) + 1)
-            ]
-        )
-
-    state = progress[index]
+    state = load_practice_progress(index)[index]
 
     session["practice_step"] = index
-    session["practice_progress"] = progress
-    session.modified = True
 
     return jsonify(
         {
@@ -7222,7 +8042,7 @@ def navigate_question():
             "choices": step.get("choices", []),
             "last_answer": state.get("last_answer", ""),
             "question_status": state.get("status", "unanswered"),
-            "chat": state.get("chat", []),
+            "chat": load_practice_chat(index),
             "character": character,
         }
     )
@@ -7238,7 +8058,7 @@ def practice_step():
     user_answer_raw = data.get("answer") or ""
     user_answer_stripped = user_answer_raw.strip()
 
-    practice_data = session.get("practice")
+    practice_data = load_practice_mission()
     index = session.get("practice_step", 0)
     character = session.get("character", "everly")
 
@@ -7264,20 +8084,7 @@ def practice_step():
         )
 
     step = steps[index]
-    progress = session.get("practice_progress", [])
-
-    if index >= len(progress):
-        progress.extend(
-            [
-                {
-                    "attempts": 0,
-                    "status": "unanswered",
-                    "last_answer": "",
-                    "chat": [],
-                }
-                for _ in range(index - len(progress) + 1)
-            ]
-        )
+    progress = load_practice_progress(index)
 
     state = progress[index]
     attempts = state.get("attempts", 0)
@@ -7295,11 +8102,8 @@ def practice_step():
             }
         )
 
-    is_correct = False
-    for exp in expected_list:
-        if answers_match(user_answer_raw, str(exp)):
-            is_correct = True
-            break
+    prepared = step.get("expected_norm") or prepare_expected_answers(expected_list)
+    is_correct = answer_in_expected(user_answer_raw, prepared)
 
     # Debug logging for answer matching issues
     if not is_correct:
@@ -7311,8 +8115,7 @@ def practice_step():
         state["status"] = "correct"
         state["last_answer"] = user_answer_raw
         progress[index] = state
-        session["practice_progress"] = progress
-        session.modified = True
+        save_practice_progress(progress)
 
         all_done = all(
             s.get("status") in ("correct", "given_up") for s in progress
@@ -7343,10 +8146,9 @@ def practice_step():
     state["attempts"] = attempts
     state["last_answer"] = user_answer_raw
     progress[index] = state
-    session["practice_progress"] = progress
-    session.modified = True
 
     if attempts < 2:
+        save_practice_progress(progress)
         return jsonify(
             {
                 "status": "incorrect",
@@ -7357,8 +8159,7 @@ def practice_step():
 
     state["status"] = "given_up"
     progress[index] = state
-    session["practice_progress"] = progress
-    session.modified = True
+    save_practice_progress(progress)
 
     explanation = step.get(
         "explanation",
@@ -7400,7 +8201,7 @@ def practice_help_message():
     data = request.get_json() or {}
     student_msg = data.get("message", "").strip()
 
-    practice_data = session.get("practice")
+    practice_data = load_practice_mission()
     index = session.get("practice_step", 0)
     character = session.get("character", "everly")
     grade = session.get("grade", "8")
@@ -7420,23 +8221,9 @@ def practice_help_message():
             }
         )
 
-    progress = session.get("practice_progress", [])
-    if index >= len(progress):
-        progress.extend(
-            [
-                {
-                    "attempts": 0,
-                    "status": "unanswered",
-                    "last_answer": "",
-                    "chat": [],
-                }
-                for _ in range(index - len(progress) + 1)
-            ]
-        )
-
-    state = progress[index]
+    state = load_practice_progress(index)[index]
     attempts = state.get("attempts", 0)
-    chat_history = state.get("chat", [])
+    chat_history = load_practice_chat(index)
 
     step = steps[index]
     prompt = step.get("prompt", "")
@@ -7491,10 +8278,8 @@ Instead, start each bullet with a simple symbol like '•'.
     reply_text = reply.get("raw_text") if isinstance(reply, dict) else reply
 
     chat_history.append({"role": "tutor", "content": reply_text})
-    state["chat"] = chat_history
-    progress[index] = state
-    session["practice_progress"] = progress
-    session.modified = True
+    # Only this question's chat is rewritten; progress is untouched
+    save_practice_chat(index, chat_history)
 
     return jsonify({"reply": reply_text, "chat": chat_history})
 
@@ -7555,7 +8340,7 @@ def dashboard():
     streak = session["streak"]
 
     xp_to_next = level * 100
-    xp_percent = int((xp / xp_to_next) * 100) if xp_to_next > 0 else 0
+    xp_percent = xp * 100 // xp_to_next if xp_to_next > 0 else 0
 
     missions = [
         "Visit 2 different planets",
@@ -7584,7 +8369,9 @@ def dashboard():
     progress_data = {"dates": [], "xp": [], "subjects": {}}
     
     if student_id:
-        # Check for new achievements
+        # Check for new achievements on every visit: XP, level, streak and
+        # token changes don't all go through log_activity, so this can't
+        # wait for the cached aggregates below to expire
         session_data = {
             "xp": xp,
             "level": level,
@@ -7592,48 +8379,91 @@ def dashboard():
             "tokens": tokens
         }
         newly_unlocked = check_and_award_achievements(student_id, session_data)
-        
-        # Get earned achievements and recent activity
-        student_achievements = get_student_achievements(student_id)
-        recent_activities = get_recent_activities(student_id, limit=8)
-        
-        # Generate progress chart data (last 7 days)
-        from datetime import timedelta
-        from models import ActivityLog, AssessmentResult
-        
-        today = datetime.utcnow()
-        dates = []
-        xp_values = []
-        
-        for i in range(6, -1, -1):
-            day = today - timedelta(days=i)
-            dates.append(day.strftime('%a'))
+        if newly_unlocked:
+            invalidate_dashboard(student_id)
+
+        cache_key = dashboard_cache_key(student_id)
+        dashboard_data = cache_get_json(cache_key)
+
+        if dashboard_data is None:
+            # Get earned achievements and recent activity
+            student_achievements = get_student_achievements(student_id)
+            recent_activities = get_recent_activities(student_id, limit=8)
+            
+            # Generate progress chart data (last 7 days)
+            from models import ActivityLog
             
-            # Sum XP earned on this day
-            day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day_start + timedelta(days=1)
+            today = datetime.utcnow()
+            week_start = (today - timedelta(days=6)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+            # Sum XP per day in one grouped query; days with no activity fill in as 0
+            day_col = db.func.date(ActivityLog.created_at)
+            xp_by_day = dict(
+                db.session.query(day_col, db.func.sum(ActivityLog.xp_earned))
+                .filter(
+                    ActivityLog.student_id == student_id,
+                    ActivityLog.created_at >= week_start,
+                )
+                .group_by(day_col)
+                .all()
+            )
+
+            dates = []
+            xp_values = []
+            for i in range(6, -1, -1):
+                day = today - timedelta(days=i)
+                dates.append(day.strftime('%a'))
+                xp_values.append(xp_by_day.get(day.strftime('%Y-%m-%d')) or 0)
             
-            day_xp = db.session.query(db.func.sum(ActivityLog.xp_earned)).filter(
+            # Subject performance (count by subject)
+            subject_counts = db.session.query(
+                ActivityLog.subject,
+                db.func.count(ActivityLog.id)
+            ).filter(
                 ActivityLog.student_id == student_id,
-                ActivityLog.created_at >= day_start,
-                ActivityLog.created_at < day_end
-            ).scalar() or 0
+                ActivityLog.subject.isnot(None)
+            ).group_by(ActivityLog.subject).all()
             
-            xp_values.append(day_xp)
-        
-        progress_data["dates"] = dates
-        progress_data["xp"] = xp_values
-        
-        # Subject performance (count by subject)
-        subject_counts = db.session.query(
-            ActivityLog.subject,
-            db.func.count(ActivityLog.id)
-        ).filter(
-            ActivityLog.student_id == student_id,
-            ActivityLog.subject.isnot(None)
-        ).group_by(ActivityLog.subject).all()
-        
-        progress_data["subjects"] = {subj.replace('_', ' ').title(): count for subj, count in subject_counts if subj}
+            progress_data["dates"] = dates
+            progress_data["xp"] = xp_values
+            progress_data["subjects"] = {subj.replace('_', ' ').title(): count for subj, count in subject_counts if subj}
+
+            # Cache only the fields the template reads (dicts work the same in Jinja)
+            cache_set_json(cache_key, {
+                "achievements": [
+                    {
+                        "achievement": {
+                            "icon": item["achievement"].icon,
+                            "name": item["achievement"].name,
+                            "description": item["achievement"].description,
+                        },
+                        "earned_at": item["earned_at"],
+                    }
+                    for item in student_achievements
+                ],
+                "activities": [
+                    {
+                        "activity_type": a.activity_type,
+                        "description": a.description,
+                        "subject": a.subject,
+                        "xp_earned": a.xp_earned or 0,
+                        "created_at": a.created_at,
+                    }
+                    for a in recent_activities
+                ],
+                "progress_data": progress_data,
+            }, DASHBOARD_CACHE_TTL)
+        else:
+            # Timestamps come back from JSON as strings; the template formats datetimes
+            student_achievements = [
+                {**item, "earned_at": datetime.fromisoformat(item["earned_at"])}
+                for item in dashboard_data["achievements"]
+            ]
+            recent_activities = [
+                {**a, "created_at": datetime.fromisoformat(a["created_at"])}
+                for a in dashboard_data["activities"]
+            ]
+            progress_data = dashboard_data["progress_data"]
 
     return render_template(
         "dashboard.html",
@@ -7666,6 +8496,34 @@ def dashboard():
 # PARENT DASHBOARD (SESSION-BASED SNAPSHOT)
 # ============================================================
 
+def session_progress_percents():
+    """Per-subject percent correct from session["progress"], memoized on g."""
+    percents = g.get("_progress_percents")
+    if percents is None:
+        percents = {
+            s: (data["correct"] * 100 // data["questions"] if data["questions"] else 0)
+            for s, data in session.get("progress", {}).items()
+        }
+        g._progress_percents = percents
+    return percents
+
+
+# Planets shown in the parent/homeschool subject explorer
+PLANETS = (
+    ("chrono_core", "chrono_core.png", "ChronoCore", "History"),
+    ("num_forge", "num_forge.png", "NumForge", "Math"),
+    ("atom_sphere", "atom_sphere.png", "AtomSphere", "Science"),
+    ("story_verse", "story_verse.png", "StoryVerse", "Reading"),
+    ("ink_haven", "ink_haven.png", "InkHaven", "Writing"),
+    ("faith_realm", "faith_realm.png", "FaithRealm", "Bible"),
+    ("coin_quest", "coin_quest.png", "CoinQuest", "Money"),
+    ("stock_star", "stock_star.png", "StockStar", "Investing"),
+    ("terra_nova", "terra_nova.png", "TerraNova", "General Knowledge"),
+    ("power_grid", "power_grid.png", "PowerGrid", "Deep Study"),
+    ("truth_forge", "truth_forge.png", "TruthForge", "Apologetics"),
+)
+
+
 @app.route("/parent_dashboard")
 def parent_dashboard():
     init_user()
@@ -7703,17 +8561,13 @@ def parent_dashboard():
 
     if parent_id:
         if not parent:  # Only query if we didn't already get it above
-            parent = Parent.query.get(parent_id)
+            parent = get_current_parent()
 
         if parent:
             # Get trial days remaining
             trial_days_remaining = get_days_remaining_in_trial(parent)
 
-            unread_messages = Message.query.filter_by(
-                recipient_type="parent",
-                recipient_id=parent_id,
-                is_read=False,
-            ).count()
+            unread_messages = unread_message_count("parent", parent_id)
 
             # Get plan limits for homeschool features
             # Admin mode automatically enables all features
@@ -7729,29 +8583,7 @@ def parent_dashboard():
                 if has_teacher_features:
                     return redirect("/homeschool/dashboard")
 
-    progress = {
-        s: (
-            int(data["correct"] / data["questions"] * 100)
-            if data["questions"]
-            else 0
-        )
-        for s, data in session["progress"].items()
-    }
-    
-    # Get all planets for subject explorer
-    planets = [
-        ("chrono_core", "chrono_core.png", "ChronoCore", "History"),
-        ("num_forge", "num_forge.png", "NumForge", "Math"),
-        ("atom_sphere", "atom_sphere.png", "AtomSphere", "Science"),
-        ("story_verse", "story_verse.png", "StoryVerse", "Reading"),
-        ("ink_haven", "ink_haven.png", "InkHaven", "Writing"),
-        ("faith_realm", "faith_realm.png", "FaithRealm", "Bible"),
-        ("coin_quest", "coin_quest.png", "CoinQuest", "Money"),
-        ("stock_star", "stock_star.png", "StockStar", "Investing"),
-        ("terra_nova", "terra_nova.png", "TerraNova", "General Knowledge"),
-        ("power_grid", "power_grid.png", "PowerGrid", "Deep Study"),
-        ("truth_forge", "truth_forge.png", "TruthForge", "Apologetics"),
-    ]
+    progress = session_progress_percents()
 
     return render_template(
         "parent_dashboard.html",
@@ -7768,7 +8600,7 @@ def parent_dashboard():
         lesson_plans_limit=lesson_plans_limit if lesson_plans_limit != float('inf') else None,
         assignments_limit=assignments_limit if assignments_limit != float('inf') else None,
         trial_days_remaining=trial_days_remaining,
-        planets=planets,
+        planets=PLANETS,
     )
 
 
@@ -7912,17 +8744,13 @@ def homeschool_dashboard():
         assignments_limit = float('inf')
 
     if parent_id:
-        parent = Parent.query.get(parent_id)
+        parent = get_current_parent()
 
         if parent:
             # Get trial days remaining
             trial_days_remaining = get_days_remaining_in_trial(parent)
 
-            unread_messages = Message.query.filter_by(
-                recipient_type="parent",
-                recipient_id=parent_id,
-                is_read=False,
-            ).count()
+            unread_messages = unread_message_count("parent", parent_id)
 
             # Get plan limits for homeschool features (unless admin mode already set them)
             if not session.get("admin_authenticated"):
@@ -7935,29 +8763,7 @@ def homeschool_dashboard():
                 # For now, we'll create a virtual class concept
                 pass
 
-    progress = {
-        s: (
-            int(data["correct"] / data["questions"] * 100)
-            if data["questions"]
-            else 0
-        )
-        for s, data in session["progress"].items()
-    }
-    
-    # Get all planets for subject explorer
-    planets = [
-        ("chrono_core", "chrono_core.png", "ChronoCore", "History"),
-        ("num_forge", "num_forge.png", "NumForge", "Math"),
-        ("atom_sphere", "atom_sphere.png", "AtomSphere", "Science"),
-        ("story_verse", "story_verse.png", "StoryVerse", "Reading"),
-        ("ink_haven", "ink_haven.png", "InkHaven", "Writing"),
-        ("faith_realm", "faith_realm.png", "FaithRealm", "Bible"),
-        ("coin_quest", "coin_quest.png", "CoinQuest", "Money"),
-        ("stock_star", "stock_star.png", "StockStar", "Investing"),
-        ("terra_nova", "terra_nova.png", "TerraNova", "General Knowledge"),
-        ("power_grid", "power_grid.png", "PowerGrid", "Deep Study"),
-        ("truth_forge", "truth_forge.png", "TruthForge", "Apologetics"),
-    ]
+    progress = session_progress_percents()
 
     return render_template(
         "homeschool_dashboard.html",
@@ -7974,10 +8780,175 @@ def homeschool_dashboard():
         lesson_plans_limit=lesson_plans_limit if lesson_plans_limit != float('inf') else None,
         assignments_limit=assignments_limit if assignments_limit != float('inf') else None,
         trial_days_remaining=trial_days_remaining,
-        planets=planets,
+        planets=PLANETS,
     )
 
 
+# Homeschool AI generation (questions, lesson plans) takes 5-40s of LLM
+# latency. It runs on ai_executor so the gunicorn thread is released right
+# away; the POST returns a job id and the page polls /homeschool/jobs/<id>.
+# Jobs live in this process only: after a worker recycle a poller gets 404.
+ai_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ai")
+_ai_jobs = {}  # {job_id: {"parent_id", "created_at", "stage", "pct", "result", "error"}}
+_ai_jobs_lock = threading.Lock()
+AI_JOB_TTL = 15 * 60  # seconds; drops jobs nobody came back to read
+
+
+def _sweep_ai_jobs():
+    """Drop stale jobs (timed-out pollers, closed tabs). Caller holds the lock."""
+    cutoff = time.monotonic() - AI_JOB_TTL
+    for job_id in [j for j, job in _ai_jobs.items() if job["created_at"] < cutoff]:
+        del _ai_jobs[job_id]
+
+
+def _set_ai_job(job_id, **fields):
+    with _ai_jobs_lock:
+        job = _ai_jobs.get(job_id)
+        if job is not None:
+            job.update(fields)
+
+
+def _start_ai_job(parent_id, fn, args) -> str:
+    """Queue fn(job_id, parent_id, args) on ai_executor and return the job id."""
+    job_id = uuid.uuid4().hex
+    with _ai_jobs_lock:
+        _sweep_ai_jobs()
+        _ai_jobs[job_id] = {
+            "parent_id": parent_id,
+            "created_at": time.monotonic(),
+            "stage": "queued",
+            "pct": 0,
+        }
+
+    def run():
+        try:
+            fn(job_id, parent_id, args)
+        except Exception as e:
+            app.logger.error(f"AI job {job_id} failed: {e}")
+            _set_ai_job(job_id, stage="error", error="Generation failed. Please try again.")
+
+    ai_executor.submit(run)
+    return job_id
+
+
+@app.route("/homeschool/jobs/<job_id>")
+@limiter.exempt  # polled every 2s; the global hourly limit would 429 a parent's second job
+def homeschool_job_status(job_id):
+    """Progress of a background AI job; finished jobs are dropped once read."""
+    parent_id = session.get("parent_id")
+    if not parent_id:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    with _ai_jobs_lock:
+        _sweep_ai_jobs()
+        job = _ai_jobs.get(job_id)
+        if job is None or job["parent_id"] != parent_id:
+            return jsonify({"error": "Job not found"}), 404
+        if job["stage"] in ("done", "error"):
+            _ai_jobs.pop(job_id, None)
+        status = {k: v for k, v in job.items() if k not in ("parent_id", "created_at")}
+
+    return jsonify(status), 200
+
+
+def _run_assign_questions_job(job_id, parent_id, args):
+    """Background half of homeschool_assign_questions: AI call + inserts."""
+    title, subject, topic, grade, num_questions, open_date, due_date = args
+    with app.app_context():
+        parent = Parent.query.get(parent_id)
+
+        # Generate questions using teacher_tools.assign_questions
+        from modules.teacher_tools import assign_questions
+
+        _set_ai_job(job_id, stage="generating", pct=10)
+        payload = assign_questions(
+            subject=subject,
+            topic=topic,
+            grade=grade,
+            character="everly",
+            differentiation_mode="none",
+            student_ability="on_level",
+            num_questions=num_questions,
+        )
+
+        # Build preview JSON in mission format
+        questions_data = payload.get("questions", [])
+        mission_json = {
+            "steps": [
+                {
+                    "prompt": q.get("prompt", ""),
+                    "type": q.get("type", "free"),
+                    "choices": q.get("choices", []),
+                    "expected": q.get("expected", []),
+                    "hint": q.get("hint", ""),
+                    "explanation": q.get("explanation", "")
+                }
+                for q in questions_data
+            ],
+            "final_message": payload.get("final_message", "Great work! Review your answers and submit when ready.")
+        }
+
+        # Homeschool students still belong to a class, so create one
+        # AssignedPractice per class the parent's students are in. Classless
+        # parents get the same placeholder ids as the manual create flow.
+        class_teachers = {
+            s.class_id: (s.class_ref.teacher_id if s.class_ref else 0)
+            for s in parent.students
+            if s.class_id
+        } or {0: 0}
+
+        assignments = [
+            AssignedPractice(
+                class_id=class_id,
+                teacher_id=teacher_id,
+                title=title,
+                subject=subject,
+                topic=topic,
+                open_date=open_date,
+                due_date=due_date,
+                preview_json=json.dumps(mission_json),
+                is_published=True,
+            )
+            for class_id, teacher_id in class_teachers.items()
+        ]
+        _set_ai_job(job_id, stage="saving", pct=80)
+        db.session.add_all(assignments)
+        db.session.flush()
+
+        # All question rows for every assignment go out in one executemany
+        question_rows = []
+        for q in questions_data:
+            choices = q.get("choices", []) or []
+            expected = q.get("expected", [])
+            row = {
+                "question_text": safe_text(q.get("prompt", ""), 1000),
+                "question_type": q.get("type", "free"),
+                "choice_a": choices[0] if len(choices) > 0 else None,
+                "choice_b": choices[1] if len(choices) > 1 else None,
+                "choice_c": choices[2] if len(choices) > 2 else None,
+                "choice_d": choices[3] if len(choices) > 3 else None,
+                "correct_answer": ",".join(expected) if isinstance(expected, list) else str(expected),
+                "explanation": safe_text(q.get("explanation", ""), 2000),
+                "difficulty_level": "medium",
+            }
+            question_rows.extend({**row, "practice_id": a.id} for a in assignments)
+
+        if question_rows:
+            db.session.execute(insert(AssignedQuestion), question_rows)
+        db.session.commit()
+
+        _set_ai_job(
+            job_id,
+            stage="done",
+            pct=100,
+            result={
+                "success": True,
+                "assignment_id": assignments[0].id,
+                "message": f"Assignment created and assigned to {len(parent.students)} student(s)",
+            },
+        )
+
+
 @csrf.exempt
 @app.route("/homeschool/assign_questions", methods=["POST"])
 def homeschool_assign_questions():
@@ -7986,7 +8957,7 @@ def homeschool_assign_questions():
     if not parent_id:
         return jsonify({"error": "Not authenticated"}), 401
 
-    parent = Parent.query.get(parent_id)
+    parent = get_current_parent()
     if not parent:
         return jsonify({"error": "Parent not found"}), 404
 
@@ -8001,114 +8972,27 @@ def homeschool_assign_questions():
     subject = safe_text(data.get("subject", "terra_nova"), 50)
     topic = safe_text(data.get("topic", ""), 500)
     grade = safe_text(data.get("grade", "8"), 10)
-    num_questions = data.get("num_questions", 10)
-    open_str = data.get("open_date", "").strip() if data.get("open_date") else ""
-    due_str = data.get("due_date", "").strip() if data.get("due_date") else ""
+    num_questions = safe_int(data.get("num_questions"), 10, 1, 20)
+    open_date = safe_date(data.get("open_date"))
+    due_date = safe_date(data.get("due_date"))
 
     if not title or not topic:
         return jsonify({"error": "Missing required fields: title, topic"}), 400
 
-    # Parse dates
-    open_date = None
-    if open_str:
-        try:
-            open_date = datetime.strptime(open_str, "%Y-%m-%d")
-        except Exception:
-            pass
-
-    due_date = None
-    if due_str:
-        try:
-            due_date = datetime.strptime(due_str, "%Y-%m-%d")
-        except Exception:
-            pass
-
-    # Generate questions using teacher_tools.assign_questions
-    from modules.teacher_tools import assign_questions
-
-    payload = assign_questions(
-        subject=subject,
-        topic=topic,
-        grade=grade,
-        character="everly",
-        differentiation_mode="none",
-        student_ability="on_level",
-        num_questions=num_questions,
-    )
-
-    # Build preview JSON in mission format
-    questions_data = payload.get("questions", [])
-    mission_json = {
-        "steps": [
-            {
-                "prompt": q.get("prompt", ""),
-                "type": q.get("type", "free"),
-                "choices": q.get("choices", []),
-                "expected": q.get("expected", []),
-                "hint": q.get("hint", ""),
-                "explanation": q.get("explanation", "")
-            }
-            for q in questions_data
-        ],
-        "final_message": payload.get("final_message", "Great work! Review your answers and submit when ready.")
-    }
-
-    # Create Practice record (not AssignedPractice since no class)
-    # For homeschool, we'll create individual practice records for each student
-    assignment = Practice(
-        teacher_id=None,  # No teacher, this is a homeschool parent
-        title=title,
-        subject=subject,
-        open_date=open_date,
-        due_date=due_date,
-        is_published=True,
+    job_id = _start_ai_job(
+        parent.id,
+        _run_assign_questions_job,
+        (title, subject, topic, grade, num_questions, open_date, due_date),
     )
-    db.session.add(assignment)
-    db.session.flush()
-
-    # Add questions to the practice
-    for idx, q in enumerate(questions_data):
-        question = PracticeQuestion(
-            practice_id=assignment.id,
-            question_order=idx + 1,
-            prompt=safe_text(q.get("prompt", ""), 1000),
-            question_type=q.get("type", "multiple_choice"),
-            choices=q.get("choices", []),
-            expected_answer=q.get("expected", ""),
-            explanation=safe_text(q.get("explanation", ""), 2000),
-        )
-        db.session.add(question)
-
-    # Assign to all parent's students
-    for student in parent.students:
-        assigned = AssignedPractice(
-            student_id=student.id,
-            practice_id=assignment.id,
-            assigned_date=datetime.utcnow(),
-        )
-        db.session.add(assigned)
-
-    db.session.commit()
-
-    return jsonify({
-        "success": True,
-        "assignment_id": assignment.id,
-        "message": f"Assignment created and assigned to {len(parent.students)} student(s)"
-    }), 200
+    return jsonify({"success": True, "job_id": job_id}), 202
 
 
 @app.route("/homeschool/assignments")
+@parent_required
 def homeschool_assignments():
     """View all assignments created by homeschool parent."""
-    parent_id = session.get("parent_id")
-    if not parent_id:
-        flash("Please log in as a parent.", "error")
-        return redirect("/parent/login")
-
-    parent = Parent.query.get(parent_id)
-    if not parent:
-        flash("Parent not found.", "error")
-        return redirect("/parent/login")
+    parent = g.parent
+    parent_id = parent.id
 
     # Check if parent has homeschool plan
     # Admin mode automatically has teacher features
@@ -8121,39 +9005,42 @@ def homeschool_assignments():
         flash("Homeschool plan required for assignment features.", "error")
         return redirect("/homeschool/dashboard")
 
-    # Get all assignments for this parent's students
-    student_ids = [s.id for s in parent.students] if parent.students else []
+    # Get all assignments for this parent's students. Assignments hang off
+    # the students' classes, so match on a class-id subquery rather than
+    # loading every Student row; the template counts each one's questions,
+    # so load them up front instead of one lazy query per card.
+    class_ids = (
+        db.session.query(Student.class_id)
+        .filter(Student.parent_id == parent.id, Student.class_id.isnot(None))
+    )
 
-    if student_ids:
-        assignments = (
-            AssignedPractice.query
-            .filter(AssignedPractice.student_id.in_(student_ids))
-            .order_by(AssignedPractice.created_at.desc())
-            .all()
-        )
-    else:
-        assignments = []
+    page = request.args.get("page", 1, type=int)
+    per_page = 25
+
+    pagination = (
+        AssignedPractice.query
+        .options(selectinload(AssignedPractice.questions))
+        .filter(AssignedPractice.class_id.in_(class_ids))
+        .order_by(AssignedPractice.created_at.desc())
+        .paginate(page=page, per_page=per_page, error_out=False)
+    )
+    assignments = pagination.items
 
     return render_template(
         "homeschool_assignments.html",
         parent=parent,
         assignments=assignments,
+        pagination=pagination,
         is_homeschool=True,
     )
 
 
 @app.route("/homeschool/assignments/create", methods=["GET", "POST"])
+@parent_required
 def homeschool_create_assignment():
     """Create manual assignment for homeschool parent's students."""
-    parent_id = session.get("parent_id")
-    if not parent_id:
-        flash("Please log in as a parent.", "error")
-        return redirect("/parent/login")
-
-    parent = Parent.query.get(parent_id)
-    if not parent:
-        flash("Parent not found.", "error")
-        return redirect("/parent/login")
+    parent = g.parent
+    parent_id = parent.id
 
     # Check if parent has homeschool plan
     # Admin mode automatically has teacher features
@@ -8171,37 +9058,26 @@ def homeschool_create_assignment():
         subject = safe_text((request.form.get("subject", "") or "general"), 50).lower()
         topic = safe_text((request.form.get("topic", "") or ""), 500)
         instructions = safe_text(request.form.get("instructions", ""), 2000)
-        due_str = request.form.get("due_date", "").strip()
-        open_str = request.form.get("open_date", "").strip()
+        due_date = safe_date(request.form.get("due_date"))
+        open_date = safe_date(request.form.get("open_date"))
 
         if not title:
             flash("Please give this assignment a title.", "error")
             return redirect("/homeschool/assignments/create")
 
-        # Parse dates
-        due_date = None
-        if due_str:
-            try:
-                due_date = datetime.strptime(due_str, "%Y-%m-%d")
-            except Exception:
-                pass
-
-        open_date = None
-        if open_str:
-            try:
-                open_date = datetime.strptime(open_str, "%Y-%m-%d")
-            except Exception:
-                pass
-
         # Create a dummy class for homeschool if parent has no students
         # or use first student's class_id if available
         class_id = None
         teacher_id = None
 
-        if parent.students:
-            # Use first student as reference
-            first_student = parent.students[0]
-            class_id = first_student.class_id if hasattr(first_student, 'class_id') else None
+        # Use first student as reference (just its class_id, not the row)
+        class_id = (
+            db.session.query(Student.class_id)
+            .filter_by(parent_id=parent.id)
+            .order_by(Student.id)
+            .limit(1)
+            .scalar()
+        )
 
         # Note: AssignedPractice requires class_id and teacher_id, but for homeschool
         # we may need to create a virtual class or allow nulls
@@ -8231,17 +9107,11 @@ def homeschool_create_assignment():
 
 
 @app.route("/homeschool/assignments/<int:practice_id>")
+@parent_required
 def homeschool_assignment_overview(practice_id):
     """View specific assignment details."""
-    parent_id = session.get("parent_id")
-    if not parent_id:
-        flash("Please log in as a parent.", "error")
-        return redirect("/parent/login")
-
-    parent = Parent.query.get(parent_id)
-    if not parent:
-        flash("Parent not found.", "error")
-        return redirect("/parent/login")
+    parent = g.parent
+    parent_id = parent.id
 
     # Check if parent has homeschool plan
     _, _, _, has_teacher_features = get_parent_plan_limits(parent)
@@ -8249,15 +9119,20 @@ def homeschool_assignment_overview(practice_id):
         flash("Homeschool plan required for assignment features.", "error")
         return redirect("/homeschool/dashboard")
 
-    practice = Practice.query.get_or_404(practice_id)
+    practice = (
+        AssignedPractice.query
+        .options(joinedload(AssignedPractice.questions))
+        .get_or_404(practice_id)
+    )
 
-    # Verify this assignment is for one of this parent's students
-    student_ids = [s.id for s in parent.students]
+    # Verify this assignment is for one of this parent's students. The same
+    # query feeds the "Assigned To" list, so load just the name column.
     assigned_students = (
-        db.session.query(AssignedPractice)
+        Student.query
+        .options(load_only(Student.id, Student.student_name))
         .filter(
-            AssignedPractice.practice_id == practice_id,
-            AssignedPractice.student_id.in_(student_ids)
+            Student.parent_id == parent.id,
+            Student.class_id == practice.class_id,
         )
         .all()
     )
@@ -8282,6 +9157,57 @@ def homeschool_assignment_overview(practice_id):
 # HOMESCHOOL - LESSON PLANS
 # ============================================================
 
+def _run_generate_lesson_job(job_id, parent_id, args):
+    """Background half of homeschool_generate_lesson: AI call + insert."""
+    title, topic, subject, grade, duration, biblical_integration, hands_on = args
+    with app.app_context():
+        # Generate lesson plan using AI
+        from modules.lesson_plan_generator import generate_lesson_plan
+
+        _set_ai_job(job_id, stage="generating", pct=10)
+        result = generate_lesson_plan(
+            title=title,
+            topic=topic,
+            subject=subject,
+            grade=grade,
+            duration=duration,
+            biblical_integration=biblical_integration,
+            hands_on=hands_on
+        )
+
+        if not result.get("success"):
+            _set_ai_job(job_id, stage="error", error=result.get("error", "Failed to generate lesson plan"))
+            return
+
+        _set_ai_job(job_id, stage="saving", pct=80)
+        lesson_data = result.get("lesson", {})
+
+        # Create HomeschoolLessonPlan record
+        lesson_plan = HomeschoolLessonPlan(
+            parent_id=parent_id,
+            title=title,
+            subject=subject,
+            grade_level=grade,
+            topic=topic,
+            duration=duration,
+            objectives=lesson_data.get("objectives", []),
+            materials=lesson_data.get("materials", []),
+            activities=lesson_data.get("activities", []),
+            discussion_questions=lesson_data.get("discussion_questions", []),
+            assessment=lesson_data.get("assessment", ""),
+            homework=lesson_data.get("homework", ""),
+            extensions=lesson_data.get("extensions", ""),
+            biblical_integration=lesson_data.get("biblical_integration") if biblical_integration else None,
+            source="ai_generated",
+            status="not_started"
+        )
+
+        db.session.add(lesson_plan)
+        db.session.commit()
+
+        _set_ai_job(job_id, stage="done", pct=100, result={"success": True, "lesson_plan_id": lesson_plan.id})
+
+
 @csrf.exempt
 @app.route("/homeschool/generate-lesson", methods=["POST"])
 @limiter.limit("10 per hour")  # Lesson generation is very expensive - strict limit
@@ -8291,7 +9217,7 @@ def homeschool_generate_lesson():
     if not parent_id:
         return jsonify({"error": "Not authenticated"}), 401
 
-    parent = Parent.query.get(parent_id)
+    parent = get_current_parent()
     if not parent:
         return jsonify({"error": "Parent not found"}), 404
 
@@ -8310,68 +9236,27 @@ def homeschool_generate_lesson():
     topic = safe_text(data.get("topic", ""), 500)
     subject = safe_text(data.get("subject", "general"), 50)
     grade = safe_text(data.get("grade", "8"), 10)
-    duration = data.get("duration", 60)
-    biblical_integration = data.get("biblical_integration", False)
-    hands_on = data.get("hands_on", True)
+    duration = safe_int(data.get("duration"), 60, 15, 240)
+    biblical_integration = bool(data.get("biblical_integration", False))
+    hands_on = bool(data.get("hands_on", True))
 
     if not title or not topic:
         return jsonify({"error": "Title and topic are required"}), 400
 
-    # Generate lesson plan using AI
-    from modules.lesson_plan_generator import generate_lesson_plan
-
-    result = generate_lesson_plan(
-        title=title,
-        topic=topic,
-        subject=subject,
-        grade=grade,
-        duration=duration,
-        biblical_integration=biblical_integration,
-        hands_on=hands_on
-    )
-
-    if not result.get("success"):
-        return jsonify({"error": result.get("error", "Failed to generate lesson plan")}), 500
-
-    lesson_data = result.get("lesson", {})
-
-    # Create HomeschoolLessonPlan record
-    lesson_plan = HomeschoolLessonPlan(
-        parent_id=parent.id,
-        title=title,
-        subject=subject,
-        grade_level=grade,
-        topic=topic,
-        duration=duration,
-        objectives=lesson_data.get("objectives", []),
-        materials=lesson_data.get("materials", []),
-        activities=lesson_data.get("activities", []),
-        discussion_questions=lesson_data.get("discussion_questions", []),
-        assessment=lesson_data.get("assessment", ""),
-        homework=lesson_data.get("homework", ""),
-        extensions=lesson_data.get("extensions", ""),
-        biblical_integration=lesson_data.get("biblical_integration") if biblical_integration else None,
-        source="ai_generated",
-        status="not_started"
+    job_id = _start_ai_job(
+        parent.id,
+        _run_generate_lesson_job,
+        (title, topic, subject, grade, duration, biblical_integration, hands_on),
     )
-
-    db.session.add(lesson_plan)
-    db.session.commit()
-
-    return jsonify({"success": True, "lesson_plan_id": lesson_plan.id}), 200
+    return jsonify({"success": True, "job_id": job_id}), 202
 
 
 @app.route("/parent/lesson-plans")
+@parent_required
 def parent_lesson_plans():
     """View all lesson plans (homeschool library)."""
-    parent_id = session.get("parent_id")
-    if not parent_id:
-        flash("Please log in as a parent.", "error")
-        return redirect("/parent/login")
-
-    parent = Parent.query.get(parent_id)
-    if not parent:
-        return redirect("/parent/login")
+    parent = g.parent
+    parent_id = parent.id
 
     # Check if parent has homeschool plan
     # Admin mode automatically has teacher features
@@ -8384,31 +9269,67 @@ def parent_lesson_plans():
         flash("This feature requires a homeschool plan.", "error")
         return redirect("/homeschool/dashboard")
 
-    # Get all lesson plans
-    lesson_plans = HomeschoolLessonPlan.query.filter_by(parent_id=parent.id)\
-        .order_by(HomeschoolLessonPlan.created_at.desc())\
-        .all()
+    # Get lesson plans a page at a time (card fields only; the JSON content
+    # columns are loaded by the detail page)
+    page = request.args.get("page", 1, type=int)
+    per_page = 25
+
+    pagination = (
+        HomeschoolLessonPlan.query
+        .options(load_only(
+            HomeschoolLessonPlan.id,
+            HomeschoolLessonPlan.title,
+            HomeschoolLessonPlan.subject,
+            HomeschoolLessonPlan.grade_level,
+            HomeschoolLessonPlan.created_at,
+            HomeschoolLessonPlan.is_favorite,
+        ))
+        .filter_by(parent_id=parent.id)
+        .order_by(HomeschoolLessonPlan.created_at.desc())
+        .paginate(page=page, per_page=per_page, error_out=False)
+    )
 
     return render_template(
         "lesson_plans_library.html",
         parent=parent,
-        lesson_plans=lesson_plans
+        lesson_plans=pagination.items,
+        pagination=pagination
     )
 
 
+# Lesson plans are large JSON rows that only change on favorite/delete, so
+# the detail page reads them through a cache-aside copy of the columns
+LESSON_PLAN_CACHE_TTL = 3600
+_LESSON_PLAN_DATETIME_COLS = ("created_at", "last_modified", "taught_date")
+
+
+def _lesson_plan_key(plan_id: int) -> str:
+    return f"v1:lp:{plan_id}"
+
+
+def get_cached_lesson_plan(plan_id: int):
+    """Return a (detached) HomeschoolLessonPlan for plan_id, or 404."""
+    data = cache_get_json(_lesson_plan_key(plan_id))
+    if data is None:
+        lesson_plan = HomeschoolLessonPlan.query.get_or_404(plan_id)
+        data = {c.key: getattr(lesson_plan, c.key) for c in HomeschoolLessonPlan.__table__.columns}
+        cache_set_json(_lesson_plan_key(plan_id), data, LESSON_PLAN_CACHE_TTL)
+        return lesson_plan
+
+    for col in _LESSON_PLAN_DATETIME_COLS:
+        if data.get(col):
+            data[col] = datetime.fromisoformat(data[col])
+    return HomeschoolLessonPlan(**data)
+
+
 @app.route("/parent/lesson-plans/<int:plan_id>")
+@parent_required
 def parent_lesson_plan_view(plan_id):
     """View a specific lesson plan."""
-    parent_id = session.get("parent_id")
-    if not parent_id:
-        flash("Please log in as a parent.", "error")
-        return redirect("/parent/login")
-
-    parent = Parent.query.get(parent_id)
-    if not parent:
-        return redirect("/parent/login")
+    parent = g.parent
+    parent_id = parent.id
 
-    lesson_plan = HomeschoolLessonPlan.query.get_or_404(plan_id)
+    lesson_plan = get_cached_lesson_plan(plan_id)
 
     # Verify parent owns this lesson plan
     if lesson_plan.parent_id != parent.id:
@@ -8429,7 +9350,7 @@ def parent_lesson_plan_favorite(plan_id):
     if not parent_id:
         return jsonify({"error": "Not authenticated"}), 401
 
-    parent = Parent.query.get(parent_id)
+    parent = get_current_parent()
     lesson_plan = HomeschoolLessonPlan.query.get_or_404(plan_id)
 
     # Verify parent owns this lesson plan
@@ -8439,19 +9360,17 @@ def parent_lesson_plan_favorite(plan_id):
     # Toggle favorite
     lesson_plan.is_favorite = not lesson_plan.is_favorite
     db.session.commit()
+    cache_delete(_lesson_plan_key(plan_id))
 
     return jsonify({"success": True, "is_favorite": lesson_plan.is_favorite}), 200
 
 
 @app.route("/parent/lesson-plans/<int:plan_id>/delete", methods=["POST"])
+@parent_required
 def parent_lesson_plan_delete(plan_id):
     """Delete a lesson plan."""
-    parent_id = session.get("parent_id")
-    if not parent_id:
-        flash("Please log in as a parent.", "error")
-        return redirect("/parent/login")
-
-    parent = Parent.query.get(parent_id)
+    parent = g.parent
+    parent_id = parent.id
     lesson_plan = HomeschoolLessonPlan.query.get_or_404(plan_id)
 
     # Verify parent owns this lesson plan
@@ -8461,6 +9380,7 @@ def parent_lesson_plan_delete(plan_id):
 
     db.session.delete(lesson_plan)
     db.session.commit()
+    cache_delete(_lesson_plan_key(plan_id))
 
     flash("Lesson plan deleted successfully.", "success")
     return redirect("/parent/lesson-plans")
@@ -8493,6 +9413,14 @@ def section_feedback():
     return jsonify({"success": True, "message": "Feedback recorded"})
 
 
+CLARIFY_PROMPT = """A student asked: "{question}"
+
+They're reading Section {section} of the answer and requested clarification:
+"{clarification}"
+
+Provide a clear, concise clarification (2-3 sentences) that directly addresses their confusion while maintaining a friendly, encouraging tone."""
+
+
 @app.route("/request_clarification", methods=["POST"])
 @csrf.exempt
 def request_clarification():
@@ -8508,26 +9436,23 @@ def request_clarification():
 
     data = request.get_json() or {}
     subject = data.get("subject")
-    question = data.get("question")
-    section = data.get("section")
-    clarification = data.get("clarification", "")
+    question = safe_text(data.get("question"), 500)
+    section = safe_int(data.get("section"), 0, 0, 6)
+    clarification = safe_text(data.get("clarification", ""), 500)
 
     grade = session.get("grade", "8")
     character = session.get("character", "everly")
 
-    # Generate clarification response using AI
-    prompt = f"""A student asked: "{question}"
-
-They're reading Section {section} of the answer and requested clarification:
-"{clarification}"
-
-Provide a clear, concise clarification (2-3 sentences) that directly addresses their confusion while maintaining a friendly, encouraging tone."""
-
-    from modules.ai_client import simple_ai_call
+    # Generate clarification response using AI; inputs are length-capped
+    # above so the prompt (and its input tokens) stays bounded
+    prompt = CLARIFY_PROMPT.format(
+        question=question,
+        section=section,
+        clarification=clarification,
+    )
 
     try:
-        reply = simple_ai_call(prompt, grade, character)
-        reply_text = reply.get("raw_text") if isinstance(reply, dict) else reply
+        reply_text = simple_ai_call(prompt, grade, character)
     except Exception as e:
         app.logger.error(f"Clarification request failed: {e}")
         reply_text = "I'd be happy to clarify! Could you ask your question in a different way? Sometimes rephrasing helps me understand what you need better."
@@ -8543,16 +9468,10 @@ Provide a clear, concise clarification (2-3 sentences) that directly addresses t
 # ============================================================
 
 @app.route("/parent/students")
+@parent_required
 def parent_students():
     """Parent student management page - view and remove students."""
-    parent_id = session.get("parent_id")
-    if not parent_id:
-        flash("Please log in as a parent.", "error")
-        return redirect("/parent/login")
-    
-    parent = Parent.query.get(parent_id)
-    if not parent:
-        return redirect("/parent/login")
+    parent = g.parent
     
     return render_template("parent_students.html", parent=parent)
 
@@ -8565,19 +9484,22 @@ def parent_remove_student(student_id):
         flash("Please log in as a parent.", "error")
         return redirect("/parent/login")
     
-    parent = Parent.query.get(parent_id)
-    student = Student.query.get_or_404(student_id)
-    
-    # Verify parent owns this student
-    if student.parent_id != parent.id:
-        flash("Not authorized.", "error")
+    # Unlink student in one UPDATE; the parent_id filter enforces ownership
+    # atomically and RETURNING supplies the name for the flash message
+    student_name = db.session.execute(
+        update(Student)
+        .where(Student.id == student_id, Student.parent_id == parent_id)
+        .values(parent_id=None)
+        .returning(Student.student_name)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if student_name is None:
+        flash("Not authorized or student not found.", "error")
         return redirect("/parent/students")
-    
-    # Unlink student (set parent_id to None)
-    student.parent_id = None
     db.session.commit()
+    invalidate_weekly_report(parent_id)
     
-    flash(f"{student.student_name} has been unlinked from your account.", "success")
+    flash(f"{student_name} has been unlinked from your account.", "success")
     return redirect("/parent/students")
 
 
@@ -8586,16 +9508,10 @@ def parent_remove_student(student_id):
 # ============================================================
 
 @app.route("/parent/time-limits", methods=["GET", "POST"])
+@parent_required
 def parent_time_limits():
     """Parent time limit controls - set daily minutes for all students."""
-    parent_id = session.get("parent_id")
-    if not parent_id:
-        flash("Please log in as a parent.", "error")
-        return redirect("/parent/login")
-    
-    parent = Parent.query.get(parent_id)
-    if not parent:
-        return redirect("/parent/login")
+    parent = g.parent
     
     if request.method == "POST":
         limit = request.form.get("daily_limit_minutes")
@@ -8624,62 +9540,54 @@ def parent_time_limits():
 
 
 @app.route("/parent/analytics")
+@parent_required
 def parent_analytics():
     """Parent analytics page with detailed subject performance."""
-    parent_id = session.get("parent_id")
-    if not parent_id:
-        flash("Please log in as a parent.", "error")
-        return redirect("/parent/login")
+    parent = g.parent
     
-    parent = Parent.query.get(parent_id)
-    if not parent:
-        return redirect("/parent/login")
-    
-    # Get selected student (default to first student)
+    # Get selected student (default to first student). The picker renders
+    # parent.students anyway, so choose from that list rather than issuing a
+    # separate lookup; membership doubles as the ownership check.
+    students = parent.students
     student_id = request.args.get("student_id", type=int)
-    if student_id:
-        selected_student = Student.query.get(student_id)
-        # Verify parent owns this student
-        if not selected_student or selected_student.parent_id != parent.id:
-            selected_student = parent.students[0] if parent.students else None
-    else:
-        selected_student = parent.students[0] if parent.students else None
+    selected_student = next((s for s in students if s.id == student_id), None)
+    if selected_student is None:
+        selected_student = students[0] if students else None
     
-    # Calculate subject statistics
+    # Per-subject totals straight from SQL instead of hydrating every
+    # AssessmentResult row and summing in Python
     subject_stats = {}
-    subject_count = 0
-    
     if selected_student:
-        for result in selected_student.assessment_results:
-            subject = result.subject
-            if subject not in subject_stats:
-                subject_stats[subject] = {'total': 0, 'count': 0, 'scores': []}
-                subject_count += 1
-            
-            subject_stats[subject]['scores'].append(result.score_percent)
-            subject_stats[subject]['total'] += result.score_percent
-            subject_stats[subject]['count'] += 1
+        rows = (
+            db.session.query(
+                AssessmentResult.subject,
+                func.count(AssessmentResult.id),
+                func.sum(AssessmentResult.score_percent),
+            )
+            .filter(AssessmentResult.student_id == selected_student.id)
+            .group_by(AssessmentResult.subject)
+            .all()
+        )
+        subject_stats = {
+            subject: {'total': total or 0, 'count': count}
+            for subject, count, total in rows
+        }
     
     return render_template(
         "parent_analytics.html",
         parent=parent,
         selected_student=selected_student,
         subject_stats=subject_stats,
-        subject_count=subject_count,
+        subject_count=len(subject_stats),
+        assessment_count=sum(s['count'] for s in subject_stats.values()),
     )
 
 
 @app.route("/parent/safety")
+@parent_required
 def parent_safety():
     """Parent view of their children's flagged content and safety alerts"""
-    parent_id = session.get("parent_id")
-    if not parent_id:
-        flash("Please log in as a parent.", "error")
-        return redirect("/parent/login")
-    
-    parent = Parent.query.get(parent_id)
-    if not parent:
-        return redirect("/parent/login")
+    parent = g.parent
     
     # Get selected student filter
     student_filter = request.args.get("student_id", type=int)
@@ -8687,21 +9595,38 @@ def parent_safety():
     # Get all question logs for this parent's students
     student_ids = [s.id for s in parent.students]
     
-    query = QuestionLog.query.filter(QuestionLog.student_id.in_(student_ids))
+    query = QuestionLog.query.filter(
+        QuestionLog.student_id.in_(student_ids),
+        QuestionLog.flagged == True,
+    )
     
     if student_filter:
         query = query.filter_by(student_id=student_filter)
     
-    # Get flagged questions only
-    flagged_logs = query.filter_by(flagged=True).order_by(QuestionLog.created_at.desc()).limit(100).all()
+    # Get flagged questions only (just the columns the alert cards show)
+    flagged_logs = (
+        query.options(load_only(
+            QuestionLog.id,
+            QuestionLog.student_id,
+            QuestionLog.subject,
+            QuestionLog.question_text,
+            QuestionLog.severity,
+            QuestionLog.allowed,
+            QuestionLog.moderation_reason,
+            QuestionLog.created_at,
+        ))
+        .order_by(QuestionLog.created_at.desc())
+        .limit(100)
+        .all()
+    )
     
-    # Calculate stats
-    total_flagged = query.filter_by(flagged=True).count()
-    high_severity_count = query.filter_by(flagged=True, severity="high").count()
-    recent_flags = query.filter(
-        QuestionLog.flagged == True,
-        QuestionLog.created_at >= datetime.utcnow() - timedelta(days=7)
-    ).count()
+    # Calculate stats in one pass with conditional aggregation
+    week_ago = datetime.utcnow() - timedelta(days=7)
+    total_flagged, high_severity_count, recent_flags = query.with_entities(
+        func.count(QuestionLog.id),
+        func.coalesce(func.sum(case((QuestionLog.severity == "high", 1), else_=0)), 0),
+        func.coalesce(func.sum(case((QuestionLog.created_at >= week_ago, 1), else_=0)), 0),
+    ).one()
     
     return render_template(
         "parent_safety.html",
@@ -8720,48 +9645,67 @@ def parent_safety():
 
 def generate_weekly_report_data(parent):
     """Generate weekly progress report data for a parent's students."""
+    cache_key = weekly_report_cache_key(parent.id)
+    cached = cache_get_json(cache_key)
+    if cached is not None:
+        return cached
+
+    now = datetime.utcnow()
+    week_ago = now - timedelta(days=7)
     report_data = {
         'parent_name': parent.name,
         'parent_email': parent.email,
-        'week_start': (datetime.utcnow() - timedelta(days=7)).strftime('%B %d, %Y'),
-        'week_end': datetime.utcnow().strftime('%B %d, %Y'),
+        'week_start': week_ago.strftime('%B %d, %Y'),
+        'week_end': now.strftime('%B %d, %Y'),
         'students': []
     }
     
-    for student in parent.students:
-        # Get assessments from past 7 days
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        weekly_assessments = [
-            r for r in student.assessment_results 
-            if r.created_at and r.created_at >= week_ago
-        ]
-        
-        if not weekly_assessments:
+    # One grouped query for every student's per-subject weekly stats
+    # instead of walking each student's full assessment history in Python
+    students = parent.students
+    rows = (
+        db.session.query(
+            AssessmentResult.student_id,
+            AssessmentResult.subject,
+            func.count(AssessmentResult.id),
+            func.sum(AssessmentResult.score_percent),
+        )
+        .filter(
+            AssessmentResult.student_id.in_([s.id for s in students]),
+            AssessmentResult.created_at >= week_ago,
+        )
+        .group_by(AssessmentResult.student_id, AssessmentResult.subject)
+        .order_by(func.min(AssessmentResult.id))
+        .all()
+    ) if students else []
+
+    subjects_by_student = {}
+    totals_by_student = {}  # {student_id: [count, score_sum]}
+    for student_id, subject, count, total in rows:
+        total = total or 0
+        subjects_by_student.setdefault(student_id, {})[subject] = {
+            'count': count,
+            'average': total / count,
+        }
+        totals = totals_by_student.setdefault(student_id, [0, 0])
+        totals[0] += count
+        totals[1] += total
+    
+    for student in students:
+        subject_performance = subjects_by_student.get(student.id)
+        if not subject_performance:
             continue  # Skip students with no activity
         
         # Calculate stats
-        total_score = sum(r.score_percent for r in weekly_assessments)
-        avg_score = total_score / len(weekly_assessments) if weekly_assessments else 0
-        
-        # Subject breakdown
-        subject_performance = {}
-        for result in weekly_assessments:
-            if result.subject not in subject_performance:
-                subject_performance[result.subject] = {'scores': [], 'count': 0}
-            subject_performance[result.subject]['scores'].append(result.score_percent)
-            subject_performance[result.subject]['count'] += 1
-        
-        # Calculate subject averages
-        for subject in subject_performance:
-            scores = subject_performance[subject]['scores']
-            subject_performance[subject]['average'] = sum(scores) / len(scores)
+        assessments_completed, total_score = totals_by_student[student.id]
+        avg_score = total_score / assessments_completed
         
         # Time spent (from today_minutes tracking)
         time_spent = student.today_minutes or 0
         
         student_data = {
             'name': student.student_name,
-            'assessments_completed': len(weekly_assessments),
+            'assessments_completed': assessments_completed,
             'average_score': round(avg_score, 1),
             'time_spent_minutes': time_spent,
             'subjects_practiced': len(subject_performance),
@@ -8771,11 +9715,17 @@ def generate_weekly_report_data(parent):
         
         report_data['students'].append(student_data)
     
+    cache_set_json(cache_key, report_data, WEEKLY_REPORT_CACHE_TTL)
     return report_data
 
 
-def send_weekly_report_email(parent):
-    """Send weekly progress report email to parent."""
+def send_weekly_report_email(parent, connection=None):
+    """
+    Send weekly progress report email to parent.
+
+    Pass an open ``mail.connect()`` connection when sending in bulk so the
+    whole batch shares one SMTP session instead of a handshake per email.
+    """
     if not parent.email_reports_enabled:
         return False
     
@@ -8791,34 +9741,30 @@ def send_weekly_report_email(parent):
             recipients=[parent.email],
         )
         
-        msg.html = render_template(
-            'emails/weekly_report.html',
-            **report_data
-        )
+        # The email template is self-contained (no request, session or
+        # url_for), so render the compiled template directly and skip
+        # render_template's context processing and signals per recipient
+        msg.html = app.jinja_env.get_template(
+            'emails/weekly_report.html'
+        ).render(**report_data)
         
-        mail.send(msg)
+        (connection or mail).send(msg)
         
         # Update last report sent timestamp
         parent.last_report_sent = datetime.utcnow()
         db.session.commit()
         
         return True
-    except Exception as e:
-        print(f"Error sending email to {parent.email}: {e}")
+    except Exception:
+        app.logger.exception("Error sending weekly report to %s", parent.email)
         return False
 
 
 @app.route("/parent/email-preferences", methods=["GET", "POST"])
+@parent_required
 def parent_email_preferences():
     """Parent email preferences - enable/disable weekly reports."""
-    parent_id = session.get("parent_id")
-    if not parent_id:
-        flash("Please log in as a parent.", "error")
-        return redirect("/parent/login")
-    
-    parent = Parent.query.get(parent_id)
-    if not parent:
-        return redirect("/parent/login")
+    parent = g.parent
     
     if request.method == "POST":
         enabled = request.form.get("email_reports_enabled") == "on"
@@ -8836,16 +9782,10 @@ def parent_email_preferences():
 
 
 @app.route("/parent/send-test-report")
+@parent_required
 def parent_send_test_report():
     """Manual trigger for testing weekly report emails."""
-    parent_id = session.get("parent_id")
-    if not parent_id:
-        flash("Please log in as a parent.", "error")
-        return redirect("/parent/login")
-    
-    parent = Parent.query.get(parent_id)
-    if not parent:
-        return redirect("/parent/login")
+    parent = g.parent
     
     success = send_weekly_report_email(parent)
     
@@ -8858,39 +9798,28 @@ def parent_send_test_report():
 
 
 @app.route("/parent/messages")
+@parent_required
 def parent_messages():
     """Parent inbox - view all messages from teachers."""
-    parent_id = session.get("parent_id")
-    if not parent_id:
-        flash("Please log in as a parent.", "error")
-        return redirect("/parent/login")
-    
-    parent = Parent.query.get(parent_id)
-    if not parent:
-        return redirect("/parent/login")
+    parent = g.parent
     
-    # Get all messages where parent is recipient
-    received = Message.query.filter_by(
-        recipient_type='parent',
-        recipient_id=parent.id
-    ).order_by(Message.created_at.desc()).all()
-    
-    # Get all messages parent sent
-    sent = Message.query.filter_by(
-        sender_type='parent',
-        sender_id=parent.id
+    # Received and sent messages in one round trip, split in Python
+    messages = Message.query.options(selectinload(Message.student)).filter(
+        db.or_(
+            (Message.recipient_type == 'parent') & (Message.recipient_id == parent.id),
+            (Message.sender_type == 'parent') & (Message.sender_id == parent.id),
+        )
     ).order_by(Message.created_at.desc()).all()
+    received = [m for m in messages if m.recipient_type == 'parent' and m.recipient_id == parent.id]
+    sent = [m for m in messages if m.sender_type == 'parent' and m.sender_id == parent.id]
     
     # Count unread
-    unread_count = Message.query.filter_by(
-        recipient_type='parent',
-        recipient_id=parent.id,
-        is_read=False
-    ).count()
+    unread_count = unread_message_count("parent", parent.id)
     
     return render_template(
         "parent_messages.html",
         parent=parent,
+        messages=received,
         received=received,
         sent=sent,
         unread_count=unread_count,
@@ -8898,13 +9827,10 @@ def parent_messages():
 
 
 @app.route("/parent/messages/<int:message_id>")
+@parent_required
 def parent_view_message(message_id):
     """View a specific message."""
-    parent_id = session.get("parent_id")
-    if not parent_id:
-        return redirect("/parent/login")
-    
-    parent = Parent.query.get(parent_id)
+    parent = g.parent
     message = Message.query.get_or_404(message_id)
     
     # Check authorization
@@ -8915,10 +9841,17 @@ def parent_view_message(message_id):
         flash("Not authorized to view this message.", "error")
         return redirect("/parent/messages")
     
-    # Mark as read if recipient
+    # Mark as read if recipient (single conditional UPDATE, no dirty-row flush)
     if is_recipient and not message.is_read:
-        message.is_read = True
+        db.session.execute(
+            update(Message)
+            .where(Message.id == message.id, Message.is_read == False)
+            .values(is_read=True)
+            .execution_options(synchronize_session=False)
+        )
         db.session.commit()
+        set_committed_value(message, "is_read", True)
+        invalidate_unread_count(("parent", parent.id))
     
     # Get student info
     student = Student.query.get(message.student_id) if message.student_id else None
@@ -8938,10 +9871,7 @@ def parent_view_message(message_id):
         recipient = Teacher.query.get(message.recipient_id)
         recipient_name = recipient.name if recipient else "Unknown Teacher"
     
-    # Parse progress report if exists
-    progress_report = None
-    if message.progress_report_json:
-        progress_report = json.loads(message.progress_report_json)
+    progress_report = message.progress_report
     
     return render_template(
         "view_message.html",
@@ -8955,13 +9885,10 @@ def parent_view_message(message_id):
 
 
 @app.route("/parent/messages/reply/<int:message_id>", methods=["GET", "POST"])
+@parent_required
 def parent_reply_message(message_id):
     """Reply to a teacher's message."""
-    parent_id = session.get("parent_id")
-    if not parent_id:
-        return redirect("/parent/login")
-    
-    parent = Parent.query.get(parent_id)
+    parent = g.parent
     original_message = Message.query.get_or_404(message_id)
     
     # Must be recipient of original message
@@ -8989,6 +9916,7 @@ def parent_reply_message(message_id):
         )
         db.session.add(reply)
         db.session.commit()
+        invalidate_unread_count(("teacher", original_message.sender_id))
         
         flash("Reply sent successfully!", "info")
         return redirect("/parent/messages")
@@ -9047,12 +9975,29 @@ def forbidden(e):
     """Handle 403 errors (forbidden access)."""
     return render_template('errors/403.html'), 403
 
+# The 500 page only varies by which of these session keys are set (nav
+# links) and by the error text, so keep recent renders instead of running
+# Jinja again for every failing request during an incident
+ERROR_PAGE_SESSION_KEYS = ("admin_authenticated", "student_id", "parent_id", "teacher_id", "parent_logged_in")
+
+
+@lru_cache(maxsize=64)
+def _render_error_500(session_flags, error):
+    return render_template('errors/500.html', error=error)
+
+
+def error_500_page(error=None):
+    """Rendered errors/500.html for the current session, reused across requests."""
+    session_flags = tuple(bool(session.get(k)) for k in ERROR_PAGE_SESSION_KEYS)
+    return _render_error_500(session_flags, error)
+
+
 @app.errorhandler(500)
 def internal_server_error(e):
     """Handle 500 errors (server crashes)."""
     app.logger.error(f"500 Error: {str(e)}")
     app.logger.error(traceback.format_exc())
-    return render_template('errors/500.html'), 500
+    return error_500_page(), 500
 
 @app.errorhandler(Exception)
 def handle_exception(e):
@@ -9062,7 +10007,7 @@ def handle_exception(e):
     app.logger.error(traceback.format_exc())
 
     # Return 500 error page
-    return render_template('errors/500.html', error=str(e)), 500
+    return error_500_page(str(e)), 500
 
 @app.errorhandler(429)
 def ratelimit_handler(e):
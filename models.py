@@ -1,3 +1,6 @@
+import json
+from functools import cached_property
+
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 
@@ -203,7 +206,7 @@ class AssignedPractice(db.Model):
     is_published = db.Column(db.Boolean, default=False)
 
     # Manual questions (optional)
-    questions = db.relationship("AssignedQuestion", backref="practice", lazy=True)
+    questions = db.relationship("AssignedQuestion", backref="practice", lazy=True, order_by="AssignedQuestion.id")
     
     # Student submissions for grading
     submissions = db.relationship("StudentSubmission", backref="assignment", lazy=True)
@@ -300,6 +303,13 @@ class Message(db.Model):
     # Relationships
     student = db.relationship("Student", backref="messages", lazy=True)
 
+    @cached_property
+    def progress_report(self):
+        """Parsed progress_report_json, decoded at most once per instance."""
+        if not self.progress_report_json:
+            return None
+        return json.loads(self.progress_report_json)
+
 
 # ============================================================
 # STUDENT SUBMISSIONS & GRADES
@@ -725,6 +735,10 @@ db.Index('idx_student_parent_id', Student.parent_id)
 db.Index('idx_student_class_id', Student.class_id)
 db.Index('idx_student_created_at', Student.created_at)  # For recent students queries
 
+# Assessment Result Indices
+db.Index('idx_assessment_result_student_created_at', AssessmentResult.student_id, AssessmentResult.created_at)  # Joins on student_id + latest-results lookups
+db.Index('idx_assessment_result_student_subject_topic', AssessmentResult.student_id, AssessmentResult.subject, AssessmentResult.topic)  # Composite for topic heatmap
+
 # Class Indices
 db.Index('idx_class_teacher_id', Class.teacher_id)
 
@@ -732,6 +746,9 @@ db.Index('idx_class_teacher_id', Class.teacher_id)
 db.Index('idx_message_student_id', Message.student_id)
 db.Index('idx_message_created_at', Message.created_at)  # For chronological sorting
 db.Index('idx_message_student_created_at', Message.student_id, Message.created_at)  # Composite for student history
+db.Index('idx_message_recipient_unread', Message.recipient_type, Message.recipient_id, Message.is_read)  # Composite for unread-count badge
+db.Index('idx_message_recipient_created_at', Message.recipient_type, Message.recipient_id, Message.created_at)  # Inbox, newest first
+db.Index('idx_message_sender_created_at', Message.sender_type, Message.sender_id, Message.created_at)  # Sent folder, newest first
 
 # Assigned Practice Indices
 db.Index('idx_assigned_practice_class_id', AssignedPractice.class_id)
@@ -755,6 +772,7 @@ db.Index('idx_question_log_created_at', QuestionLog.created_at)
 db.Index('idx_activity_log_student_id', ActivityLog.student_id)
 db.Index('idx_activity_log_created_at', ActivityLog.created_at)
 db.Index('idx_activity_log_activity_type', ActivityLog.activity_type)
+db.Index('idx_activity_log_student_created_at', ActivityLog.student_id, ActivityLog.created_at)  # Composite for daily XP chart
 
 # Student Achievement Indices
 db.Index('idx_student_achievement_student_id', StudentAchievement.student_id)
@@ -774,6 +792,7 @@ db.Index('idx_game_leaderboard_high_score', GameLeaderboard.high_score)  # For h
 db.Index('idx_homeschool_lesson_plan_parent_id', HomeschoolLessonPlan.parent_id)
 db.Index('idx_homeschool_lesson_plan_subject', HomeschoolLessonPlan.subject)
 db.Index('idx_homeschool_lesson_plan_created_at', HomeschoolLessonPlan.created_at)
+db.Index('idx_homeschool_lesson_plan_parent_created_at', HomeschoolLessonPlan.parent_id, HomeschoolLessonPlan.created_at)  # Composite for paginated library
 
 # Arcade Enhancement Indices
 db.Index('idx_student_badge_student_id', StudentBadge.student_id)
@@ -5,6 +5,22 @@ Manages unlocking, tracking, and displaying student achievements
 
 from models import db, Achievement, StudentAchievement, ActivityLog, Student
 from datetime import datetime
+from modules.cache_helper import cache_delete
+
+
+# Student dashboard aggregates (achievements, activity feed, XP chart) are
+# cached briefly per student and dropped whenever their activity changes
+DASHBOARD_CACHE_TTL = 60  # seconds
+
+
+def dashboard_cache_key(student_id):
+    return f"dash:{student_id}"
+
+
+def invalidate_dashboard(student_id):
+    """Drop a student's cached dashboard aggregates after XP/activity changes."""
+    if student_id:
+        cache_delete(dashboard_cache_key(student_id))
 
 
 # ============================================================
@@ -233,6 +249,7 @@ def log_activity(student_id, activity_type, subject=None, description="", xp_ear
     )
     db.session.add(activity)
     db.session.commit()
+    invalidate_dashboard(student_id)
 
 
 def get_recent_activities(student_id, limit=10):
@@ -8,6 +8,25 @@
 from datetime import datetime
 from models import db, Student, AssessmentResult
 from modules.ability_helper import recalc_student_ability
+from modules.cache_helper import cache_delete
+
+
+# ------------------------------------------------------------
+# Parent weekly reports are aggregated from these rows and cached;
+# every writer below drops the owning parent's copy.
+# ------------------------------------------------------------
+
+WEEKLY_REPORT_CACHE_TTL = 3600  # seconds
+
+
+def weekly_report_cache_key(parent_id):
+    return f"weekly_report:{parent_id}"
+
+
+def invalidate_weekly_report(parent_id):
+    """Drop a parent's cached weekly report after new assessment results."""
+    if parent_id:
+        cache_delete(weekly_report_cache_key(parent_id))
 
 
 # ------------------------------------------------------------
@@ -88,6 +107,7 @@ def log_practice_event(
     # Recalculate ability tier
     recalc_student_ability(student)
     db.session.commit()
+    invalidate_weekly_report(student.parent_id)
 
     return True
 
@@ -149,6 +169,7 @@ def log_finished_practice_session(
 
     recalc_student_ability(student)
     db.session.commit()
+    invalidate_weekly_report(student.parent_id)
 
     return True
 
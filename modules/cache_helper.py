@@ -0,0 +1,134 @@
+# modules/cache_helper.py
+"""
+Small key/value cache with TTLs.
+
+Uses Redis when REDIS_URL is set (shared across gunicorn workers and
+restarts). Falls back to an in-process dict, which is emptied whenever
+gunicorn recycles the worker (--max-requests), so without Redis only
+store values that can be recomputed on a miss. State that must survive
+(in-progress missions) should check get_redis() and keep to the session
+when it returns None.
+"""
+
+import os
+import json
+import time
+import threading
+
+
+# -------------------------------
+# Lazy-load Redis client
+# -------------------------------
+_redis_client = None
+_redis_checked = False
+
+
+def get_redis():
+    """Return a Redis client if REDIS_URL is configured, else None."""
+    global _redis_client, _redis_checked
+    if _redis_checked:
+        return _redis_client
+    _redis_checked = True
+
+    url = os.getenv("REDIS_URL")
+    if not url:
+        return None
+    try:
+        import redis
+        _redis_client = redis.Redis.from_url(url, decode_responses=True)
+        _redis_client.ping()
+    except Exception as e:
+        print(f"⚠️ Redis unavailable, using in-memory cache: {e}")
+        _redis_client = None
+    return _redis_client
+
+
+# -------------------------------
+# In-memory fallback
+# -------------------------------
+_memory = {}  # {key: (expires_at, value)}
+_memory_lock = threading.Lock()
+_MEMORY_MAX_KEYS = 5000
+
+
+def _memory_get(key):
+    with _memory_lock:
+        item = _memory.get(key)
+        if not item:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del _memory[key]
+            return None
+        return value
+
+
+def _memory_set(key, value, ttl):
+    now = time.monotonic()
+    with _memory_lock:
+        if len(_memory) >= _MEMORY_MAX_KEYS:
+            # Drop expired entries first, then the oldest-expiring ones
+            for k in [k for k, (exp, _) in _memory.items() if exp < now]:
+                del _memory[k]
+            if len(_memory) >= _MEMORY_MAX_KEYS:
+                for k, _ in sorted(_memory.items(), key=lambda kv: kv[1][0])[: _MEMORY_MAX_KEYS // 10]:
+                    del _memory[k]
+        _memory[key] = (now + ttl, value)
+
+
+# -------------------------------
+# Public API
+# -------------------------------
+def cache_get(key: str):
+    """Return the cached string for `key`, or None on miss/error."""
+    r = get_redis()
+    if r is not None:
+        try:
+            return r.get(key)
+        except Exception:
+            return None
+    return _memory_get(key)
+
+
+def cache_set(key: str, value: str, ttl: int = 300) -> None:
+    """Store a string under `key` for `ttl` seconds (Redis SETEX)."""
+    r = get_redis()
+    if r is not None:
+        try:
+            r.setex(key, ttl, value)
+        except Exception:
+            pass
+        return
+    _memory_set(key, value, ttl)
+
+
+def cache_delete(*keys: str) -> None:
+    """Invalidate one or more keys."""
+    if not keys:
+        return
+    r = get_redis()
+    if r is not None:
+        try:
+            r.delete(*keys)
+        except Exception:
+            pass
+        return
+    with _memory_lock:
+        for key in keys:
+            _memory.pop(key, None)
+
+
+def cache_get_json(key: str):
+    """cache_get + json.loads; returns None on miss or bad payload."""
+    raw = cache_get(key)
+    if raw is None:
+        return None
+    try:
+        return json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+def cache_set_json(key: str, value, ttl: int = 300) -> None:
+    """json.dumps + cache_set."""
+    cache_set(key, json.dumps(value, default=str), ttl)
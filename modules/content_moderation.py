@@ -15,10 +15,11 @@ core doctrines like salvation through Christ alone, while blocking
 hate speech and abuse of religious content.
 """
 
-import os
 import re
+import hashlib
 from datetime import datetime, timedelta
-from openai import OpenAI
+from modules.shared_ai import get_client
+from modules.cache_helper import cache_get_json, cache_set_json
 
 
 # -------------------------------------------------------
@@ -156,6 +157,17 @@ def is_respectful_christian_inquiry(text: str) -> bool:
 # -------------------------------------------------------
 # OpenAI Moderation API
 # -------------------------------------------------------
+# Verdicts are cached per exact text so repeated topics/questions skip the
+# network. Clean verdicts live an hour; flagged ones only a few minutes so
+# policy changes propagate. API failures (fail_closed) are never cached.
+MODERATION_CACHE_TTL = 3600
+MODERATION_FLAGGED_CACHE_TTL = 300
+
+
+def _moderation_cache_key(text: str) -> str:
+    return "mod:" + hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
 def check_openai_moderation(text: str) -> dict:
     """
     Use OpenAI's Moderation API to check for policy violations.
@@ -168,8 +180,22 @@ def check_openai_moderation(text: str) -> dict:
         "reason": str description of why it was flagged
     }
     """
+    cache_key = _moderation_cache_key(text)
+    cached = cache_get_json(cache_key)
+    if cached is not None:
+        return cached
+
+    verdict = _call_openai_moderation(text)
+    if not verdict.get("fail_closed"):
+        ttl = MODERATION_FLAGGED_CACHE_TTL if verdict["flagged"] else MODERATION_CACHE_TTL
+        cache_set_json(cache_key, verdict, ttl)
+    return verdict
+
+
+def _call_openai_moderation(text: str) -> dict:
+    """Uncached Moderation API call; fails closed on errors."""
     try:
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        client = get_client()
         response = client.moderations.create(input=text)
         
         result = response.results[0]
@@ -0,0 +1,29 @@
+# modules/http_client.py
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# -------------------------------
+# Shared outbound HTTP session
+# -------------------------------
+# PowerGrid URL imports reuse one pooled session so repeat hosts keep their
+# TCP/TLS connection alive instead of handshaking on every request.
+HTTP_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+
+_session = None
+
+
+def get_http_session() -> requests.Session:
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=50,
+            max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _session = session
+    return _session
@@ -34,7 +34,7 @@ def generate_lesson_plan(
     """
 
     # Import OpenAI client using shared module
-    from modules.shared_ai import get_client
+    from modules.shared_ai import get_client, ai_request
     client = get_client()
 
     # Build the prompt
@@ -110,7 +110,8 @@ Make it age-appropriate for grade {grade}, engaging, and practical for a homesch
 
     try:
         # Use OpenAI Chat Completions API with timeout
-        response = client.chat.completions.create(
+        response = ai_request(
+            client.chat.completions.create,
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are an expert homeschool curriculum designer. Generate comprehensive, engaging lesson plans in valid JSON format."},
@@ -2,7 +2,7 @@
 
 import json
 from typing import Dict, Any
-from modules.shared_ai import get_client, build_character_voice, grade_depth_instruction
+from modules.shared_ai import get_client, ai_request, build_character_voice, grade_depth_instruction
 
 
 # ------------------------------------------------------------
@@ -281,7 +281,8 @@ IMPORTANT:
         print(f"\nUSER PROMPT:\n{user_prompt}")
         print(f"{'='*60}\n")
 
-    response = client.responses.create(
+    response = ai_request(
+        client.responses.create,
         model="gpt-4.1-mini",
         max_output_tokens=4000,  # Increased from 1800 to accommodate more questions with full details
         input=[
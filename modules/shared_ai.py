@@ -1,13 +1,54 @@
 # modules/shared_ai.py
 import os
+import random
+import threading
+import time
 
 
 # -------------------------------
 # Lazy-load OpenAI client
 # -------------------------------
+# One shared client per process so every AI call reuses the same pooled
+# HTTPS connections instead of paying a fresh TLS handshake per request.
+# The SDK default timeout is 10 minutes; a stalled call would hold a
+# gunicorn thread far past the 120s worker timeout, so cap it.
+AI_REQUEST_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "90"))
+
+# Every outbound call also takes a slot from a process-wide semaphore so a
+# traffic spike queues here instead of tripping the provider's rate limit,
+# and a 429 is retried after a jittered exponential sleep.
+AI_MAX_CONCURRENT = int(os.getenv("AI_MAX_CONCURRENT", "8"))
+AI_RATE_LIMIT_RETRIES = 3
+
+_ai_slots = threading.BoundedSemaphore(AI_MAX_CONCURRENT)
+_client = None
+
+
 def get_client():
-    from openai import OpenAI
-    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            timeout=AI_REQUEST_TIMEOUT,
+            max_retries=1,
+        )
+    return _client
+
+
+def ai_request(create, **kwargs):
+    """Run an SDK create call under the concurrency gate, retrying 429s."""
+    from openai import RateLimitError
+
+    for attempt in range(AI_RATE_LIMIT_RETRIES + 1):
+        with _ai_slots:
+            try:
+                return create(**kwargs)
+            except RateLimitError:
+                if attempt == AI_RATE_LIMIT_RETRIES:
+                    raise
+        # Sleep outside the slot so queued callers are not held up.
+        time.sleep(random.uniform(0, 2 ** attempt))
 
 
 # -------------------------------------------------------
@@ -113,12 +154,51 @@ GRADE RULE:
 
     client = get_client()
 
-    response = client.responses.create(
+    response = ai_request(
+        client.responses.create,
+        model="gpt-4.1-mini",
+        input=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt},
+        ],
+    )
+
+    return response.output_text
+
+
+# -------------------------------------------------------
+# SHORT CONVERSATIONAL REPLY (clarifications, follow-ups)
+# -------------------------------------------------------
+# Replies are 2-3 sentences, so cap the output: generation time dominates
+# the call and this keeps the request thread free sooner.
+SIMPLE_AI_MAX_TOKENS = 300
+
+
+def simple_ai_call(prompt: str, grade: str, character: str) -> str:
+    voice = build_character_voice(character)
+    depth_rule = grade_depth_instruction(grade)
+
+    system_prompt = f"""
+You are CozmicLearning — a warm, gentle tutor who loves God and loves students.
+Answer in plain paragraphs with no section labels.
+
+CHARACTER VOICE:
+{voice}
+
+GRADE RULE:
+{depth_rule}
+"""
+
+    client = get_client()
+
+    response = ai_request(
+        client.responses.create,
         model="gpt-4.1-mini",
         input=[
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": prompt},
         ],
+        max_output_tokens=SIMPLE_AI_MAX_TOKENS,
     )
 
     return response.output_text
@@ -226,7 +306,8 @@ GRADE LEVEL DEPTH:
 
     client = get_client()
 
-    response = client.responses.create(
+    response = ai_request(
+        client.responses.create,
         model="gpt-4.1",
         input=[
             {"role": "system", "content": system_prompt},
@@ -19,7 +19,7 @@ BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 sys.path.insert(0, BASE_DIR)
 
 # Set up Flask app context
-from app import app, db, Parent, send_weekly_report_email
+from app import app, db, mail, Parent, send_weekly_report_email
 from datetime import datetime
 
 def send_all_weekly_reports():
@@ -34,26 +34,29 @@ def send_all_weekly_reports():
         skip_count = 0
         error_count = 0
         
-        for parent in parents:
-            try:
-                # Check if parent has students
-                if not parent.students:
-                    skip_count += 1
-                    continue
+        # One SMTP session for the whole batch (Flask-Mail's bulk pattern);
+        # MAIL_MAX_EMAILS, if set, makes it reconnect every N messages.
+        with mail.connect() as conn:
+            for parent in parents:
+                try:
+                    # Check if parent has students
+                    if not parent.students:
+                        skip_count += 1
+                        continue
                 
-                # Send report
-                success = send_weekly_report_email(parent)
+                    # Send report
+                    success = send_weekly_report_email(parent, connection=conn)
                 
-                if success:
-                    success_count += 1
-                    print(f"✅ Sent report to {parent.email}")
-                else:
-                    skip_count += 1
-                    print(f"⏭️  Skipped {parent.email} (no activity or disabled)")
+                    if success:
+                        success_count += 1
+                        print(f"✅ Sent report to {parent.email}")
+                    else:
+                        skip_count += 1
+                        print(f"⏭️  Skipped {parent.email} (no activity or disabled)")
                     
-            except Exception as e:
-                error_count += 1
-                print(f"❌ Error sending to {parent.email}: {e}")
+                except Exception as e:
+                    error_count += 1
+                    print(f"❌ Error sending to {parent.email}: {e}")
         
         print(f"\n[{datetime.now()}] Job complete!")
         print(f"📊 Results: {success_count} sent, {skip_count} skipped, {error_count} errors")
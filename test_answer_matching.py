@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""
+Regression checks for assignment answer matching.
+
+prepare_expected_answers() / answer_in_expected() replace a per-answer
+answers_match() loop, so every case here is also checked against the
+original (pre-regex) matching rules copied below.
+
+Run with:  python test_answer_matching.py   (or pytest)
+"""
+
+from app import answer_in_expected, answers_match, prepare_expected_answers
+
+
+# ------------------------------------------------------------
+# Original matching rules, kept verbatim as the reference
+# ------------------------------------------------------------
+
+def _baseline_normalize(text):
+    if not text:
+        return ""
+    t = text.lower().strip()
+    for word in ["percent", "perc", "per cent", "dollars", "dollar", "usd", "the answer is", "answer:", "="]:
+        t = t.replace(word, "")
+    t = t.replace(",", "")
+    for ch in ["%", "$"]:
+        t = t.replace(ch, "")
+    return t.strip()
+
+
+def _baseline_float(val):
+    if not val:
+        return None
+    try:
+        return float(val)
+    except Exception:
+        return None
+
+
+def _baseline_match(user_raw, expected_raw):
+    if user_raw is None or expected_raw is None:
+        return False
+    u_norm = user_raw.strip().lower()
+    e_norm = expected_raw.strip().lower()
+    if u_norm == e_norm and u_norm != "":
+        return True
+    u_num_str = _baseline_normalize(user_raw)
+    e_num_str = _baseline_normalize(expected_raw)
+    if u_num_str and e_num_str and u_num_str == e_num_str:
+        return True
+    u_num = _baseline_float(u_num_str)
+    e_num = _baseline_float(e_num_str)
+    if u_num is not None and e_num is not None and abs(u_num - e_num) < 1e-6:
+        return True
+    u_direct = _baseline_float(user_raw.strip())
+    e_direct = _baseline_float(expected_raw.strip())
+    if u_direct is not None and e_direct is not None and abs(u_direct - e_direct) < 1e-6:
+        return True
+    return False
+
+
+def _baseline_in_expected(user_raw, expected):
+    return any(_baseline_match(user_raw, str(e)) for e in expected)
+
+
+def check(user_raw, expected, should_match):
+    """Assert the prepared matcher, answers_match and the baseline all agree."""
+    prepared = prepare_expected_answers(expected)
+    got = answer_in_expected(user_raw, prepared)
+    assert got == should_match, f"{user_raw!r} vs {expected!r}: got {got}, want {should_match}"
+    assert _baseline_in_expected(user_raw, expected) == should_match, \
+        f"baseline disagrees for {user_raw!r} vs {expected!r}"
+    assert any(answers_match(user_raw, str(e)) for e in expected) == should_match, \
+        f"answers_match disagrees for {user_raw!r} vs {expected!r}"
+
+
+# ------------------------------------------------------------
+# Tests
+# ------------------------------------------------------------
+
+def test_numeric_formats():
+    check("1,000", ["1000"], True)
+    check("1000", ["1,000"], True)
+    check("1000.0", ["1000"], True)
+    check("1000", ["1000.0"], True)
+    check("$5", ["5"], True)
+    check("5", ["$5"], True)
+    check("5 dollars", ["$5.00"], True)
+    check("50%", ["50 percent"], True)
+    check("The answer is 42", ["42"], True)
+    check("= 7", ["7"], True)
+    check("x = 7", ["7"], False)
+    check("0.1", ["1/10"], False)
+    check("1001", ["1,000"], False)
+    check("$6", ["5"], False)
+
+
+def test_case_and_whitespace():
+    check("Paris", ["paris"], True)
+    check("  PARIS  ", ["Paris"], True)
+    check("photosynthesis\n", ["Photosynthesis"], True)
+    check("pari s", ["Paris"], False)
+    check("", ["Paris"], False)
+    check("   ", [""], False)
+
+
+def test_multi_answer_lists():
+    expected = ["Washington", "George Washington", "$1", "0.5"]
+    check("george washington", expected, True)
+    check("WASHINGTON", expected, True)
+    check("1", expected, True)
+    check("1.00", expected, True)
+    check(".5", expected, True)
+    check("50%", expected, False)
+    check("Lincoln", expected, False)
+    check("anything", [], False)
+
+
+def test_prepared_answers_are_json_safe():
+    import json
+    prepared = prepare_expected_answers(["1,000", "Paris", 3])
+    assert json.loads(json.dumps(prepared)) == prepared
+    assert answer_in_expected("3", prepared)
+    assert not answer_in_expected(None, prepared)
+    assert not answer_in_expected("3", {})
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
+    print("\nAll answer matching checks passed.")
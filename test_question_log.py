@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Regression check: every question asked through /subject keeps its
+QuestionLog row, including subjects that hand off with a redirect
+(PowerGrid) instead of returning an AI answer.
+
+Creates a throwaway student in the local database and removes it (and its
+log rows) afterwards.
+
+Run with:  python test_question_log.py   (or pytest)
+"""
+
+from datetime import datetime
+
+import app as app_module
+from app import app
+from models import db, Student, QuestionLog
+
+
+def _allow(text, student_id=None, context="question"):
+    """Stand-in moderation verdict, so the check needs no API key."""
+    return {"allowed": True, "flagged": False, "severity": "low", "reason": None, "sanitized_text": text}
+
+
+def test_power_grid_question_is_logged():
+    question = f"PowerGrid log check {datetime.utcnow().isoformat()}"
+    app.config["WTF_CSRF_ENABLED"] = False
+    app_module.limiter.enabled = False
+    original_moderate = app_module.moderate_content
+    app_module.moderate_content = _allow
+
+    with app.app_context():
+        student = Student(student_name="Log Check", student_email="log-check@example.com",
+                          plan="premium", subscription_active=True)
+        db.session.add(student)
+        db.session.commit()
+        student_id = student.id
+
+    try:
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess.update(user_role="student", student_id=student_id, user_id=student_id,
+                        student_email="log-check@example.com", character="everly")
+
+        response = client.post("/subject", data={"subject": "power_grid", "grade": "10", "question": question})
+        assert response.status_code == 302
+        assert "/ask-question?subject=power_grid" in response.headers["Location"]
+
+        with app.app_context():
+            log = QuestionLog.query.filter_by(student_id=student_id, question_text=question).first()
+            assert log is not None, "PowerGrid question was not committed to QuestionLog"
+            assert log.subject == "power_grid"
+            assert log.allowed and not log.flagged
+            assert log.severity == "low"
+    finally:
+        app_module.moderate_content = original_moderate
+        with app.app_context():
+            QuestionLog.query.filter_by(student_id=student_id).delete()
+            db.session.delete(Student.query.get(student_id))
+            db.session.commit()
+
+
+if __name__ == "__main__":
+    test_power_grid_question_is_logged()
+    print("✅ test_power_grid_question_is_logged")